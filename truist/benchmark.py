@@ -0,0 +1,496 @@
+import os
+import io
+import sys
+import json
+import platform
+import random
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import parser as ledger_parser
+from parser import (
+    CATEGORY_KEYWORDS, PAYCHECK_KEYWORDS, REFUND_KEYWORDS, categorize_transaction,
+    CategoryTotals, WeeklyTotals, MonthlyTotals
+)
+from ledger import NUMPY_AVAILABLE, ColumnarLedger, load_numpy
+from profiling import StageProfiler
+from synthetic import PREFIXES, generate_rows, generate_statements, write_plaid_export, write_truist_csv
+
+# Cumulative cold-import budgets in milliseconds; the CLIs should start in tens of milliseconds
+IMPORT_BUDGETS_MS = {"parser": 100, "store": 50, "export": 50, "plaid_client": 50, "exchange_token": 50, "plaid_fetch": 120}
+# Heavy dependencies that must only load when a call needs them
+DEFERRED_IMPORTS = ("plaid", "numpy")
+
+def categorize_transaction_linear(description, amount):
+    """
+    Reference linear keyword scan that the compiled matcher replaced (amount in dollars).
+    """
+    desc_upper = description.upper()
+
+    if any(keyword in desc_upper for keyword in PAYCHECK_KEYWORDS):
+        return "Paychecks"
+    if "RETURN" in desc_upper and amount < 0:
+        return "Refunds"
+    if abs(amount) == 2500:
+        return "Rent/Utilities"
+    if any(keyword in desc_upper for keyword in ["TRANSFER"]):
+        return "Transfers"
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword in desc_upper:
+                return category
+    return "Miscellaneous"
+
+def with_rule_edge_cases(rows, seed=0):
+    """
+    Rework a share of synthetic (datetime, description, amount) rows into the cases the
+    rule order decides: two merchants in one description, returns, transfers, the rent
+    amount and lowercase text.
+    """
+    rng = random.Random(seed)
+    descriptions = [description for _, description, _ in rows]
+    for date_obj, description, amount in rows:
+        roll = rng.random()
+        if roll < 0.2:
+            description = f"{description} {rng.choice(descriptions)}"
+        elif roll < 0.25:
+            description = f"RETURN {description}"
+        elif roll < 0.28:
+            description = f"{description} TRANSFER"
+        elif roll < 0.29:
+            amount = rng.choice([ledger_parser.RENT_AMOUNT_CENTS, -ledger_parser.RENT_AMOUNT_CENTS])
+        if rng.random() < 0.3:
+            description = description.lower()
+        yield date_obj, description, amount
+
+def generate_descriptions(count, seed=0, distinct=None):
+    """
+    Return count (description, amount in cents) pairs from synthetic.generate_rows,
+    reworked into rule edge cases. With distinct set, pairs are drawn from a pool of that many.
+    """
+    rows = list(generate_rows(distinct or count, seed))
+    pairs = [(description, amount) for _, description, amount in with_rule_edge_cases(rows, seed)]
+    if distinct:
+        rng = random.Random(seed)
+        return [rng.choice(pairs) for _ in range(count)]
+    return pairs
+
+def time_categorizer(func, rows):
+    """
+    Categorize every row with func and return (elapsed seconds, results).
+    """
+    start = time.perf_counter()
+    results = [func(desc, amt) for desc, amt in rows]
+    return time.perf_counter() - start, results
+
+def add_synthetic_rules(count, seed=0):
+    """
+    Grow CATEGORY_KEYWORDS with count made-up merchant keywords, ahead of Miscellaneous.
+    """
+    rng = random.Random(seed)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    merchants = ["".join(rng.choice(letters) for _ in range(rng.randint(5, 12))) for _ in range(count)]
+    misc = CATEGORY_KEYWORDS.pop("Miscellaneous", [])
+    for i in range(0, count, 20):
+        CATEGORY_KEYWORDS[f"Synthetic {i // 20}"] = merchants[i:i + 20]
+    CATEGORY_KEYWORDS["Miscellaneous"] = misc
+
+def benchmark_categorization(count, seed=0, distinct=None):
+    """
+    Check the compiled matcher against the linear scan and print timings for both.
+    """
+    rows = generate_descriptions(count, seed, distinct)
+    matcher = ledger_parser.get_category_matcher()
+
+    def uncached(desc, amt):
+        return matcher._categorize_key(desc.upper(), amt < 0, abs(amt) == ledger_parser.RENT_AMOUNT_CENTS)
+
+    def linear(desc, amt):
+        return categorize_transaction_linear(desc, amt / 100)
+
+    linear_time, expected = time_categorizer(linear, rows)
+    uncached_time, actual = time_categorizer(uncached, rows)
+    compiled_time, cached = time_categorizer(matcher.categorize, rows)
+    public_time, public = time_categorizer(categorize_transaction, rows)
+
+    mismatches = [(row, exp, act) for row, exp, act in zip(rows, expected, actual) if exp != act]
+    mismatches += [(row, exp, act) for row, exp, act in zip(rows, expected, cached) if exp != act]
+    mismatches += [(row, exp, act) for row, exp, act in zip(rows, expected, public) if exp != act]
+    for (desc, amt), exp, act in mismatches[:10]:
+        print(f"❌ Mismatch: {desc} | ${ledger_parser.format_cents(amt)} | expected {exp}, got {act}")
+    if mismatches:
+        raise SystemExit(f"❌ {len(mismatches)} categorizations differ from the linear scan.")
+
+    keyword_count = sum(len(kws) for kws in CATEGORY_KEYWORDS.values())
+    print(f"✅ {count} rows categorized identically against {keyword_count} keywords.")
+    print(f"Linear scan:             {linear_time:.3f}s ({count / linear_time:,.0f} rows/s)")
+    print(f"Compiled matcher:        {uncached_time:.3f}s ({count / uncached_time:,.0f} rows/s)")
+    print(f"Compiled + LRU cache:    {compiled_time:.3f}s ({count / compiled_time:,.0f} rows/s)")
+    print(f"categorize_transaction:  {public_time:.3f}s ({count / public_time:,.0f} rows/s)")
+    info = matcher.cache_info()
+    print(f"Cache: {info.hits} hits, {info.misses} misses, {info.currsize}/{info.maxsize} entries")
+
+def generate_transactions(count, seed=0, years=10):
+    """
+    Return synthetic.generate_rows as a date-sorted list of categorized transaction dicts.
+    """
+    matcher = ledger_parser.get_category_matcher()
+    return [
+        {
+            'date': date_obj.strftime("%m/%d/%Y"),
+            'description': description,
+            'amount': amount,
+            'category': matcher.categorize(description, amount),
+            'DateObj': date_obj
+        }
+        for date_obj, description, amount in generate_rows(count, seed, years=years)
+    ]
+
+def timed(func, *args):
+    """
+    Call func and return (elapsed seconds, result).
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def aggregate(aggregator, transactions):
+    for tx in transactions:
+        aggregator.add(tx)
+    return aggregator
+
+def assert_totals_match(name, expected, actual):
+    """
+    Check cent totals from the running aggregators against the columnar ledger.
+    """
+    if expected != actual:
+        raise SystemExit(f"❌ {name} totals differ between the running aggregators and the columnar ledger.")
+
+def benchmark_summaries(count, seed=0):
+    """
+    Compare the dict-based running aggregators with the columnar ledger and print timings.
+    """
+    if not NUMPY_AVAILABLE:
+        print("numpy is not installed, skipping columnar summary benchmark.")
+        return
+    transactions = generate_transactions(count, seed)
+    load_numpy()  # keep the one-off numpy import out of the build timing
+
+    build_time, ledger = timed(ColumnarLedger.from_transactions, transactions, REFUND_KEYWORDS)
+    timings = [("Build columnar ledger", build_time, None)]
+    for name, aggregator, columnar in [
+        ("Category totals", CategoryTotals, ledger.category_totals),
+        ("Weekly totals", WeeklyTotals, ledger.weekly_totals),
+        ("Monthly totals", MonthlyTotals, ledger.monthly_totals),
+    ]:
+        dict_time, totals = timed(aggregate, aggregator(), transactions)
+        vector_time, grouped = timed(columnar)
+        expected = totals.sums if name == "Category totals" else (totals.weeks if name == "Weekly totals" else totals.months)
+        if name == "Category totals":
+            assert_totals_match(name, expected, grouped)
+        else:
+            for period in expected:
+                assert_totals_match(f"{name} {period}", expected[period], grouped.get(period, {}))
+        timings.append((name, dict_time, vector_time))
+
+    print(f"✅ {count} rows summarized identically.")
+    for name, dict_time, vector_time in timings:
+        if vector_time is None:
+            print(f"{name + ':':<24} {dict_time * 1000:9.1f} ms")
+        else:
+            print(f"{name + ':':<24} {dict_time * 1000:9.1f} ms dicts, {vector_time * 1000:7.1f} ms columnar")
+
+def benchmark_pipeline(rows, seed=0, trace_memory=False):
+    """
+    Run the parser pipeline stage by stage over a generated statements folder.
+    Returns the profiler report; stage output is discarded.
+    """
+    profiler = StageProfiler(trace_memory)
+    with tempfile.TemporaryDirectory() as folder, redirect_stdout(io.StringIO()) as discarded:
+        with profiler.stage("generate", rows):
+            generate_statements(folder, rows, seed)
+
+        with profiler.stage("load") as record:
+            transactions = ledger_parser.load_all_transactions_from_folder(folder, use_cache=False)
+            record["rows"] = len(transactions)
+
+        # Time categorization on its own, starting from a cold cache
+        matcher = ledger_parser.get_category_matcher()
+        matcher._categorize_cached.cache_clear()
+        with profiler.stage("categorize", len(transactions)):
+            for tx in transactions:
+                matcher.categorize(tx['description'], tx['amount'])
+
+        with profiler.stage("deduplicate", len(transactions)):
+            transactions = ledger_parser.deduplicate_transactions(transactions)
+
+        with profiler.stage("summarize_by_category", len(transactions)):
+            ledger_parser.summarize_by_category(transactions)
+        with profiler.stage("weekly_summary", len(transactions)):
+            ledger_parser.print_weekly_summary(transactions)
+        with profiler.stage("monthly_summary", len(transactions)):
+            ledger_parser.print_monthly_summary(transactions)
+            discarded.truncate(0)
+        with profiler.stage("export_json", len(transactions)):
+            ledger_parser.write_transactions_json(transactions, os.path.join(folder, "export.json"))
+
+    profiler.print_summary()
+    return profiler.report(
+        rows=rows, seed=seed, numpy=NUMPY_AVAILABLE,
+        python=platform.python_version(), platform=sys.platform
+    )
+
+def cold_report(folder):
+    """
+    Return the report text a fresh run over folder prints, with no ingestion cache.
+    """
+    with redirect_stdout(io.StringIO()):
+        transactions = ledger_parser.deduplicate_transactions(
+            ledger_parser.load_all_transactions_from_folder(folder, use_cache=False)
+        )
+    with redirect_stdout(io.StringIO()) as out:
+        ledger_parser.run_report(transactions, weekly=True, monthly=True)
+    return out.getvalue()
+
+def benchmark_live_ledger(rows, seed=0):
+    """
+    Check that a warm LiveLedger reports byte-identically to a cold run after each kind
+    of statement change, and print the refresh timings.
+
+    The rows span two years, so most days have rows from several files, and the folder
+    holds an overlapping lowercase re-export of one CSV, so both the within-day order
+    and which copy the dedup keeps show up in the report.
+    """
+    base = list(generate_rows(rows, seed, years=2))
+    later = list(generate_rows(max(rows // 50, 1), seed + 1, start=base[-1][0] + timedelta(days=1), years=1))
+    backdated = list(generate_rows(max(rows // 50, 1), seed + 2, start=base[0][0], years=1))
+    with tempfile.TemporaryDirectory() as folder:
+        def path(name):
+            return os.path.join(folder, name)
+
+        steps = [
+            ("load", lambda: (
+                write_truist_csv(path("a.csv"), base[0::3]),
+                write_truist_csv(path("b.csv"), base[1::3]),
+                write_truist_csv(path("c.csv"), [(d, desc.lower(), amt) for d, desc, amt in base[0::6]]),
+                write_plaid_export(path("plaid_synthetic.ndjson"), base[2::3], seed),
+            )),
+            ("append", lambda: write_truist_csv(path("b.csv"), base[1::3] + later)),
+            ("backdate", lambda: write_truist_csv(path("a.csv"), sorted(base[0::3] + backdated))),
+            ("remove", lambda: os.remove(path("b.csv"))),
+        ]
+        live = ledger_parser.LiveLedger(folder)
+        timings = []
+        for name, apply in steps:
+            apply()
+            with redirect_stdout(io.StringIO()):
+                elapsed, change = timed(live.refresh)
+            with redirect_stdout(io.StringIO()) as warm:
+                live.report(weekly=True, monthly=True)
+            cold_time, cold = timed(cold_report, folder)
+            if warm.getvalue() != cold:
+                raise SystemExit(f"❌ Warm report after {name} ({change[0]}) differs from a cold run.")
+            timings.append((name, change[0], elapsed, cold_time))
+
+    print(f"✅ Warm reports over {rows} rows match cold runs after each statement change.")
+    for name, action, elapsed, cold_time in timings:
+        print(f"{name + ':':<24} {elapsed * 1000:9.1f} ms {action}, {cold_time * 1000:9.1f} ms cold")
+
+def compare_to_baseline(report, baseline_path):
+    """
+    Print each stage's time against a saved baseline report.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("rows") != report["rows"]:
+        print(f"⚠️  Baseline was recorded with {baseline.get('rows')} rows, this run used {report['rows']}.")
+    before = {stage["stage"]: stage["seconds"] for stage in baseline.get("stages", [])}
+    print(f"\nCompared with {baseline_path}:")
+    for stage in report["stages"]:
+        if stage["stage"] not in before:
+            continue
+        old, new = before[stage["stage"]], stage["seconds"]
+        ratio = f"{new / old:.2f}x" if old else "n/a"
+        print(f"{stage['stage'] + ':':<24} {old * 1000:10.1f} ms -> {new * 1000:10.1f} ms ({ratio})")
+
+def save_baseline(report, baseline_path):
+    directory = os.path.dirname(baseline_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    ledger_parser.write_json_atomic(baseline_path, report, indent=2)
+    print(f"Saved baseline to {baseline_path}")
+
+def measure_import(module):
+    """
+    Import module in a fresh interpreter without Plaid credentials.
+    Returns (cumulative import time in ms, deferred dependencies it loaded anyway).
+    """
+    env = {name: value for name, value in os.environ.items() if not name.startswith("PLAID_")}
+    code = f"import sys, {module}; print(','.join(name for name in {DEFERRED_IMPORTS!r} if name in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env, capture_output=True, text=True
+    )
+    if result.returncode:
+        raise SystemExit(f"❌ Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    # importtime lines read "import time: self [us] | cumulative | name"; the module's own line comes last
+    line = next(line for line in reversed(result.stderr.splitlines()) if line.endswith(f"| {module}"))
+    cumulative_us = int(line.split("|")[1])
+    return cumulative_us / 1000, [name for name in result.stdout.strip().split(",") if name]
+
+def benchmark_imports(budgets=IMPORT_BUDGETS_MS, repeats=3):
+    """
+    Check each module's best-of-repeats cold import time against its budget, and that
+    importing it loads neither the Plaid SDK nor numpy.
+    """
+    failures = []
+    print("Cold import times:")
+    for module, budget in budgets.items():
+        runs = [measure_import(module) for _ in range(repeats)]
+        best = min(ms for ms, _ in runs)
+        loaded = runs[0][1]
+        status = "✅" if best <= budget and not loaded else "❌"
+        print(f"{status} {module + ':':<22} {best:8.1f} ms (budget {budget} ms)"
+              + (f", loaded {', '.join(loaded)}" if loaded else ""))
+        if status == "❌":
+            failures.append(module)
+    if failures:
+        raise SystemExit(f"❌ Import budget exceeded by: {', '.join(failures)}")
+
+def mock_plaid_transaction(item, index, rng):
+    """
+    Build a minimal transaction record that the Plaid client accepts.
+    """
+    day = datetime(2025, 1, 1) + timedelta(days=rng.randrange(365))
+    return {
+        "transaction_id": f"{item}-{index}",
+        "account_id": f"{item}-checking",
+        "amount": rng.randint(-40000, 150000) / 100,
+        "iso_currency_code": "USD",
+        "unofficial_currency_code": None,
+        "date": day.strftime("%Y-%m-%d"),
+        "authorized_date": None,
+        "authorized_datetime": None,
+        "datetime": None,
+        "name": rng.choice(PREFIXES),
+        "payment_channel": "in store",
+        "pending": False,
+        "transaction_code": None,
+    }
+
+class MockPlaidHandler(BaseHTTPRequestHandler):
+    """
+    Serve /transactions/sync from pre-generated pages after a fixed latency.
+    """
+    pages = {}
+    latency = 0.0
+    lock = threading.Lock()
+    in_flight = 0
+    peak_in_flight = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak_in_flight = max(cls.peak_in_flight, cls.in_flight)
+        time.sleep(cls.latency)
+        added, next_cursor, has_more = cls.pages[(body["access_token"], body.get("cursor", ""))]
+        payload = json.dumps({
+            "added": added, "modified": [], "removed": [], "accounts": [],
+            "next_cursor": next_cursor, "has_more": has_more,
+            "transactions_update_status": "HISTORICAL_UPDATE_COMPLETE", "request_id": "mock",
+        }).encode("utf-8")
+        with cls.lock:
+            cls.in_flight -= 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def benchmark_plaid_fetch(items=6, pages=3, page_size=100, latency_ms=50, seed=0):
+    """
+    Time serial and concurrent multi-item syncs against a local mock Plaid endpoint.
+    """
+    rng = random.Random(seed)
+    tokens = [f"access-mock-{i}" for i in range(items)]
+    MockPlaidHandler.latency = latency_ms / 1000
+    MockPlaidHandler.pages = {}
+    for token in tokens:
+        for page in range(pages):
+            added = [mock_plaid_transaction(token, page * page_size + i, rng) for i in range(page_size)]
+            cursor = f"page-{page}" if page else ""
+            MockPlaidHandler.pages[(token, cursor)] = (added, f"page-{page + 1}", page + 1 < pages)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockPlaidHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # The shared Plaid client is built from the environment on first use, so point it at the mock first
+    for name, value in [("PLAID_CLIENT_ID", "mock"), ("PLAID_SECRET", "mock"), ("PLAID_ENV", "sandbox")]:
+        os.environ.setdefault(name, value)
+    os.environ["PLAID_HOST"] = f"http://127.0.0.1:{server.server_port}"
+    import plaid_fetch
+
+    # Two items per institution, so the per-institution cap is exercised
+    item_list = [(f"institution-{i // 2}", token) for i, token in enumerate(tokens)]
+    timings = []
+    try:
+        for workers in (1, plaid_fetch.FETCH_WORKERS):
+            with tempfile.TemporaryDirectory() as folder:
+                MockPlaidHandler.peak_in_flight = 0
+                elapsed, results = timed(plaid_fetch.sync_items, item_list, folder, page_size, workers, 1)
+                if any(result != (pages * page_size, 0, 0) for result in results):
+                    raise SystemExit(f"❌ Mock sync with {workers} workers returned {results}")
+                timings.append((workers, elapsed, MockPlaidHandler.peak_in_flight))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"✅ Synced {items} items x {pages} pages x {page_size} rows from a mock endpoint ({latency_ms} ms latency).")
+    for workers, elapsed, peak in timings:
+        print(f"{f'{workers} worker(s):':<24} {elapsed * 1000:9.1f} ms (peak {peak} requests in flight)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark parser.py hot paths.")
+    parser.add_argument("--rows", type=int, default=200_000, help="Number of synthetic transactions")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic ledger")
+    parser.add_argument("--distinct", type=int, default=None, help="Draw descriptions from a pool of this many merchants")
+    parser.add_argument("--extra-keywords", type=int, default=0, help="Grow the rules table with synthetic merchant keywords")
+    parser.add_argument("--pipeline-rows", type=int, default=0,
+                        help="Also benchmark the full pipeline over this many synthetic statement rows")
+    parser.add_argument("--live-rows", type=int, default=5_000,
+                        help="Check warm LiveLedger reports against cold runs over this many rows (0 to skip)")
+    parser.add_argument("--trace-memory", action="store_true", help="Record per-stage peak allocations with tracemalloc")
+    parser.add_argument("--baseline", help="Compare the pipeline benchmark against this saved report")
+    parser.add_argument("--save-baseline", help="Save the pipeline benchmark report as a baseline at this path")
+    parser.add_argument("--fetch-items", type=int, default=0,
+                        help="Also benchmark concurrent Plaid syncs of this many items against a mock endpoint")
+    parser.add_argument("--fetch-latency", type=int, default=50, help="Mock Plaid endpoint latency in milliseconds")
+    parser.add_argument("--skip-imports", action="store_true", help="Skip the cold import time budget check")
+    args = parser.parse_args()
+
+    if not args.skip_imports:
+        benchmark_imports()
+    if args.extra_keywords:
+        add_synthetic_rules(args.extra_keywords, args.seed)
+    benchmark_categorization(args.rows, args.seed, args.distinct)
+    benchmark_summaries(args.rows, args.seed)
+    if args.live_rows:
+        benchmark_live_ledger(args.live_rows, args.seed)
+    if args.pipeline_rows:
+        report = benchmark_pipeline(args.pipeline_rows, args.seed, args.trace_memory)
+        if args.baseline:
+            compare_to_baseline(report, args.baseline)
+        if args.save_baseline:
+            save_baseline(report, args.save_baseline)
+    if args.fetch_items:
+        benchmark_plaid_fetch(args.fetch_items, latency_ms=args.fetch_latency, seed=args.seed)
@@ -1,40 +1,13 @@
-import os
 import argparse
-from dotenv import load_dotenv
-from plaid.api import plaid_api
-from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
-from plaid.configuration import Configuration
-from plaid.api_client import ApiClient
 
-# Load environment variables
-load_dotenv()
-
-PLAID_CLIENT_ID = os.getenv("PLAID_CLIENT_ID")
-PLAID_SECRET = os.getenv("PLAID_SECRET")
-PLAID_ENV = os.getenv("PLAID_ENV")
-
-# Map Plaid environment string to actual endpoint URL
-env_map = {
-    "sandbox": "https://sandbox.plaid.com",
-    "development": "https://development.plaid.com",
-    "production": "https://production.plaid.com"
-}
-
-configuration = Configuration(
-    host=env_map.get(PLAID_ENV, "https://sandbox.plaid.com"),
-    api_key={
-        'clientId': PLAID_CLIENT_ID,
-        'secret': PLAID_SECRET,
-    }
-)
-
-api_client = ApiClient(configuration)
-client = plaid_api.PlaidApi(api_client)
+from plaid_client import get_plaid_client
 
 def exchange_public_token(public_token: str) -> str:
+    from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
+
     try:
         request = ItemPublicTokenExchangeRequest(public_token=public_token)
-        response = client.item_public_token_exchange(request)
+        response = get_plaid_client().item_public_token_exchange(request)
         access_token = response['access_token']
         print("Access Token:", access_token)
         return access_token
@@ -47,6 +20,10 @@ def save_token_to_file(token: str, path: str = ".access_token"):
         f.write(token)
     print(f"Access token saved to {path}")
 
+def load_token_from_file(path: str = ".access_token") -> str:
+    with open(path, "r") as f:
+        return f.read().strip()
+
 def save_token_to_env(token: str, env_path: str = ".env"):
     with open(env_path, "a") as f:
         f.write(f"\nPLAID_ACCESS_TOKEN={token}")
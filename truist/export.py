@@ -0,0 +1,181 @@
+import os
+import csv
+import json
+import hashlib
+import functools
+from datetime import datetime
+from json.encoder import encode_basestring_ascii as json_string
+
+EXPORT_FORMATS = ("json", "ndjson", "csv")
+EXPORT_FIELDS = ("date", "description", "amount", "category")
+EXPORT_STATE_FILE = ".export_state.json"
+DATE_TEXT_CACHE_SIZE = 16384
+EXPORT_BUFFER_ROWS = 4096
+
+class HashingWriter:
+    """
+    Buffered text file wrapper that hashes and counts the UTF-8 bytes written through it.
+    With no file it only hashes. Call flush() before reading the digest or size.
+    """
+
+    def __init__(self, f=None, buffer_size=EXPORT_BUFFER_ROWS):
+        self.f = f
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.buffer = []
+        self.buffer_size = buffer_size
+
+    def write(self, text):
+        self.buffer.append(text)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        chunk = "".join(self.buffer)
+        self.buffer.clear()
+        data = chunk.encode("utf-8")
+        self.digest.update(data)
+        self.size += len(data)
+        if self.f is not None:
+            self.f.write(chunk)
+
+def format_cents(cents):
+    """
+    Format integer cents as a dollar string like '-1234.56', valid as both CSV and JSON.
+    """
+    dollars, remainder = divmod(abs(cents), 100)
+    return f"{'-' if cents < 0 else ''}{dollars}.{remainder:02d}"
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """
+    Write JSON to a temporary file and rename it into place.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, **dump_kwargs)
+    os.replace(tmp_path, path)
+
+@functools.lru_cache(maxsize=DATE_TEXT_CACHE_SIZE)
+def date_text(date_obj, fmt):
+    return date_obj.strftime(fmt)
+
+def export_date(tx):
+    """
+    Return the transaction's date as YYYY-MM-DD, or the raw date string when it did not parse.
+    """
+    return date_text(tx['DateObj'], '%Y-%m-%d') if tx.get('DateObj') else tx['date']
+
+def json_record(tx):
+    """
+    Render a transaction as one record of the indented JSON array export.
+
+    The text matches json.dumps(indent=2) of the transaction with DateObj as MM/DD/YYYY
+    and the amount in dollars, built field by field so no copy of the dict is made and
+    the pure-Python indenting encoder is bypassed.
+    """
+    lines = []
+    for key, value in tx.items():
+        if key == 'DateObj':
+            if not isinstance(value, datetime):
+                continue
+            value = date_text(value, '%m/%d/%Y')
+        elif key == 'amount':
+            value = value / 100
+        text = json_string(value) if isinstance(value, str) else json.dumps(value)
+        lines.append(f"    {json_string(key)}: {text}")
+    return "  {\n" + ",\n".join(lines) + "\n  }"
+
+def write_json(f, transactions):
+    """
+    Write transactions as an indented JSON array, one record at a time. Returns the count.
+    """
+    count = 0
+    f.write("[")
+    for tx in transactions:
+        f.write(("," if count else "") + "\n" + json_record(tx))
+        count += 1
+    f.write("\n]" if count else "]")
+    return count
+
+def write_ndjson(f, transactions):
+    """
+    Write transactions as compact newline-delimited JSON with exact decimal amounts. Returns the count.
+    """
+    count = 0
+    for tx in transactions:
+        f.write(
+            f'{{"date":{json_string(export_date(tx))},"description":{json_string(tx["description"])},'
+            f'"amount":{format_cents(tx["amount"])},"category":{json_string(tx["category"])}}}\n'
+        )
+        count += 1
+    return count
+
+def write_csv(f, transactions):
+    """
+    Write transactions as CSV with a header row. Returns the count.
+    """
+    writer = csv.writer(f, lineterminator="\n")
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    for tx in transactions:
+        writer.writerow((export_date(tx), tx['description'], format_cents(tx['amount']), tx['category']))
+        count += 1
+    return count
+
+WRITERS = {"json": write_json, "ndjson": write_ndjson, "csv": write_csv}
+
+def load_export_state(state_path):
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def serialize(transactions, fmt, f=None):
+    """
+    Write transactions in fmt to f, or only hash them with no f. Returns (HashingWriter, row count).
+    """
+    writer = HashingWriter(f)
+    count = WRITERS[fmt](writer, transactions)
+    writer.flush()
+    return writer, count
+
+def write_export(transactions, tmp_path, fmt):
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        return serialize(transactions, fmt, f)
+
+def export_transactions(transactions, path, fmt="json"):
+    """
+    Export transactions to path in fmt, skipping the write when nothing changed.
+
+    When the last export in this format is still on disk, the serialized rows are
+    hashed first and the file is only written, through a temporary file renamed
+    into place, if the hash differs. A one-shot iterator cannot be serialized twice,
+    so it is written to the temporary file as it is hashed, which is dropped if it
+    turns out unchanged. Returns (path of the current export, row count, whether it
+    was written).
+    """
+    state_path = os.path.join(os.path.dirname(path) or ".", EXPORT_STATE_FILE)
+    tmp_path = f"{path}.tmp"
+    state = load_export_state(state_path)
+    last = state.get(fmt)
+    if last and not os.path.exists(last["path"]):
+        last = None
+    hash_first = last is not None and iter(transactions) is not transactions
+
+    if hash_first:
+        writer, count = serialize(transactions, fmt)
+    else:
+        writer, count = write_export(transactions, tmp_path, fmt)
+    sha256 = writer.digest.hexdigest()
+    if last and last["sha256"] == sha256 and os.path.getsize(last["path"]) == writer.size:
+        if not hash_first:
+            os.remove(tmp_path)
+        return last["path"], count, False
+
+    if hash_first:
+        write_export(transactions, tmp_path, fmt)
+    os.replace(tmp_path, path)
+    state[fmt] = {"path": path, "sha256": sha256, "size": writer.size, "count": count}
+    write_json_atomic(state_path, state, indent=2)
+    return path, count, True
@@ -0,0 +1,171 @@
+import importlib.util
+from array import array
+from datetime import date
+
+# numpy is optional (parser.py falls back to its running aggregators) and costs ~100 ms
+# to import, so it is only located here and loaded when a ledger is first built
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+np = None
+NO_DAY = 0
+UNIX_EPOCH_DAY = date(1970, 1, 1).toordinal()
+
+def load_numpy():
+    """
+    Import numpy on first use. Raises ImportError when it is not installed.
+    """
+    global np
+    if np is None:
+        if not NUMPY_AVAILABLE:
+            raise ImportError("ColumnarLedger requires numpy")
+        import numpy
+        np = numpy
+    return np
+
+class ColumnarLedger:
+    """
+    Transactions stored as parallel arrays instead of one dict per row.
+
+    Dates are day numbers (date ordinals, NO_DAY when unknown), amounts are integer
+    cents, categories are small integer codes into `categories`, and descriptions
+    are codes into an interned `descriptions` table. Summaries are vectorized
+    group-by reductions over these columns and return totals in cents.
+    """
+
+    def __init__(self, days, cents, category_codes, description_codes, categories, descriptions, refund_flags):
+        load_numpy()
+        self.days = days
+        self.cents = cents
+        self.category_codes = category_codes
+        self.description_codes = description_codes
+        self.categories = categories
+        self.descriptions = descriptions
+        self.refund_flags = refund_flags
+
+    @classmethod
+    def from_transactions(cls, transactions, refund_keywords=()):
+        """
+        Build a ledger from any iterable of transaction dicts without keeping the dicts.
+        Descriptions containing one of refund_keywords are flagged as refunds.
+        """
+        load_numpy()
+        days = array('q')
+        cents = array('q')
+        category_codes = array('h')
+        description_codes = array('i')
+        category_index = {}
+        description_index = {}
+
+        for tx in transactions:
+            date_obj = tx.get('DateObj')
+            days.append(date_obj.toordinal() if date_obj else NO_DAY)
+            cents.append(tx.get('amount', 0))
+            category = tx.get('category', 'Miscellaneous')
+            code = category_index.get(category)
+            if code is None:
+                code = category_index[category] = len(category_index)
+            category_codes.append(code)
+            description = tx.get('description', '')
+            code = description_index.get(description)
+            if code is None:
+                code = description_index[description] = len(description_index)
+            description_codes.append(code)
+
+        descriptions = list(description_index)
+        refund_flags = np.array(
+            [any(keyword in desc.upper() for keyword in refund_keywords) for desc in descriptions],
+            dtype=bool
+        )
+        return cls(
+            np.frombuffer(days, dtype=np.int64),
+            np.frombuffer(cents, dtype=np.int64),
+            np.frombuffer(category_codes, dtype=np.int16),
+            np.frombuffer(description_codes, dtype=np.int32),
+            list(category_index),
+            descriptions,
+            refund_flags
+        )
+
+    def __len__(self):
+        return len(self.cents)
+
+    def _category_mask(self, category):
+        if category not in self.categories:
+            return np.zeros(len(self), dtype=bool)
+        return self.category_codes == self.categories.index(category)
+
+    def _grouped_totals(self, periods, mask, values=None):
+        """
+        Sum cents by (period, category) over rows where mask is set.
+        Returns {period: {category: cents}} with categories in first-seen order.
+        """
+        values = (self.cents if values is None else values)[mask]
+        ncat = max(len(self.categories), 1)
+        keys = periods[mask].astype(np.int64) * ncat + self.category_codes[mask]
+        if not len(keys):
+            return {}
+
+        low = int(keys.min())
+        span = int(keys.max()) - low + 1
+        if span <= max(4 * len(keys), 1 << 16):
+            # Compact key range: bin directly instead of sorting
+            bins = keys - low
+            sums = np.bincount(bins, weights=values, minlength=span)
+            first_rows = np.full(span, len(keys), dtype=np.int64)
+            first_rows[bins[::-1]] = np.arange(len(keys) - 1, -1, -1)
+            present = np.flatnonzero(first_rows < len(keys))
+            unique_keys, first_rows, sums = present + low, first_rows[present], sums[present]
+        else:
+            unique_keys, first_rows, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            sums = np.bincount(inverse.ravel(), weights=values, minlength=len(unique_keys))
+
+        grouped = {}
+        for i in np.argsort(first_rows, kind='stable'):
+            period, code = divmod(int(unique_keys[i]), ncat)
+            grouped.setdefault(period, {})[self.categories[code]] = int(round(sums[i]))
+        return grouped
+
+    def category_totals(self):
+        """
+        Total cents by category excluding transfers, with refunds subtracting their absolute amount.
+        """
+        mask = ~self._category_mask("Transfers")
+        refunds = self.refund_flags[self.description_codes] if len(self.descriptions) else np.zeros(len(self), dtype=bool)
+        values = np.where(refunds, -np.abs(self.cents), self.cents)
+        return self._grouped_totals(np.zeros(len(self), dtype=np.int64), mask, values).get(0, {})
+
+    def total_expenses(self):
+        """
+        Total absolute cents of negative, non-transfer transactions.
+        """
+        mask = (self.cents < 0) & ~self._category_mask("Transfers")
+        return int(-self.cents[mask].sum())
+
+    def weekly_totals(self):
+        """
+        Total cents by ISO (year, week) and category, excluding transfers and undated rows.
+        """
+        mask = (self.days != NO_DAY) & ~self._category_mask("Transfers")
+        # Day ordinal 1 is a Monday, so this numbers Monday-to-Sunday weeks
+        weeks = (self.days - 1) // 7
+        return {
+            tuple(date.fromordinal(week * 7 + 1).isocalendar()[:2]): totals
+            for week, totals in self._grouped_totals(weeks, mask).items()
+        }
+
+    def monthly_totals(self):
+        """
+        Total cents by 'YYYY-MM' month (or 'Unknown') and category, excluding transfers.
+        Months that only hold transfers are present with no categories.
+        """
+        dated = self.days != NO_DAY
+        months = (self.days - UNIX_EPOCH_DAY).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        unknown_month = int(months[dated].max()) + 1 if dated.any() else 0
+        months[~dated] = unknown_month
+        grouped = self._grouped_totals(months, ~self._category_mask("Transfers"))
+
+        def month_key(month):
+            if month == unknown_month and not dated.all():
+                return 'Unknown'
+            return f"{1970 + month // 12:04d}-{month % 12 + 1:02d}"
+
+        return {month_key(month): grouped.get(month, {}) for month in map(int, np.unique(months))}
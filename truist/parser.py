@@ -1,16 +1,27 @@
 import os
+import sys
 import csv
 import json
 import glob
 import re
-from collections import defaultdict
-from datetime import datetime
-from dotenv import load_dotenv
-load_dotenv()
-
-PLAID_CLIENT_ID = os.getenv("PLAID_CLIENT_ID")
-PLAID_SECRET = os.getenv("PLAID_SECRET")
-PLAID_ENV = os.getenv("PLAID_ENV")
+import functools
+import logging
+import hashlib
+import heapq
+import bisect
+import queue
+import threading
+import time
+import itertools
+import tempfile
+import tracemalloc
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from export import EXPORT_FORMATS, export_transactions, format_cents, write_json, write_json_atomic
+from ledger import NO_DAY, NUMPY_AVAILABLE, ColumnarLedger
+from profiling import StageProfiler
+from store import BUDGET_PERIODS, DEFAULT_STORE_PATH, MANUAL_SOURCE, STATEMENTS_SOURCE, TransactionStore
 
 CATEGORY_KEYWORDS = {
     "Paychecks": ["PR PAYMENT", "MOBILE DEPOSIT"],
@@ -45,170 +56,883 @@ CATEGORY_KEYWORDS = {
 
 EXCLUDE_DESCRIPTIONS = ["RETURN", "OVERDRAFT TRANSFER", "TRANSFER"]
 REFUND_KEYWORDS = ["RETURN", "REFUND"]
+PAYCHECK_KEYWORDS = ["PAYROLL", "MOBILE DEPOSIT", "PAYCHECK", "SALARY", "DIRECT DEPOSIT", "GUSTO PAY"]
+TRANSFER_KEYWORDS = ["TRANSFER"]
+RENT_AMOUNT_CENTS = 250000
+CATEGORY_CACHE_SIZE = 8192
+DATE_CACHE_SIZE = 16384
+AMOUNT_CACHE_SIZE = 16384
+NORMALIZE_CACHE_SIZE = 16384
+DEDUP_LOG_EXAMPLES = 50
+LEDGER_CACHE_DIR = ".ledger_cache"
+LEDGER_CACHE_VERSION = 3
+PLAID_EXPORT_FIELDS = ("transaction_id", "date", "amount", "name")
+JSON_CHUNK_SIZE = 1 << 16
+# What may follow a complete element of a JSON array
+JSON_ELEMENT_DELIMITERS = ", \t\r\n]"
+EXPORT_PREFIX = "transactions_"
+# Only our own daily CSV export, transactions_MMDDYYYY.csv; other transactions_*.csv files are statements
+EXPORT_CSV_RE = re.compile(rf"{EXPORT_PREFIX}\d{{8}}\.csv", re.ASCII)
+WATCH_INTERVAL = 2.0
+# Below this many rows the running aggregators beat importing numpy (~100 ms) and building columns
+COLUMNAR_MIN_ROWS = 50_000
+PLAID_SOURCE = "plaid"
+
+def _keyword_trie(priority):
+    """
+    Build a character trie of the keywords in {keyword: rule}. Each keyword's end node
+    holds its best rule: the lowest among itself and the keywords that are its prefixes.
+
+    Keywords are inserted shortest first, so the running minimum carried down a path
+    already covers every prefix keyword on it. Returns (trie, {keyword: best rule}).
+    """
+    trie, best = {}, {}
+    for keyword in sorted(priority, key=len):
+        node, rule = trie, priority[keyword]
+        for char in keyword:
+            node = node.setdefault(char, {})
+            rule = min(rule, node.get("", rule))
+        node[""] = best[keyword] = rule
+    return trie, best
+
+def _keyword_trie_pattern(trie):
+    """
+    Build a regex matching the longest keyword of a _keyword_trie, factored along the trie.
+    """
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+class CategoryMatcher:
+    """
+    Compiled single-pass matcher for the categorization rules.
+
+    Every paycheck, transfer and category keyword is folded into one trie-shaped regex
+    wrapped in a lookahead, so a single scan reports the longest keyword starting at each
+    position. Each keyword maps to the best rule among itself and the keywords that are
+    its prefixes, so the lowest of those ranks is the rule the linear scan would return.
+    """
+
+    def __init__(self, category_keywords, paycheck_keywords=None, transfer_keywords=None):
+        self.rules = {category: list(keywords) for category, keywords in category_keywords.items()}
+        self.rule_order = list(self.rules)
+        self.rule_category = []
+        priority = {}
+
+        def add_rule(keywords, category):
+            rule = len(self.rule_category)
+            self.rule_category.append(category)
+            for keyword in keywords:
+                priority.setdefault(keyword, rule)
+
+        add_rule(PAYCHECK_KEYWORDS if paycheck_keywords is None else paycheck_keywords, "Paychecks")
+        add_rule(TRANSFER_KEYWORDS if transfer_keywords is None else transfer_keywords, "Transfers")
+        for category, keywords in self.rules.items():
+            add_rule(keywords, category)
+
+        trie, best = _keyword_trie(priority)
+        self.priority = {keyword: best[keyword] for keyword in priority}
+        self.pattern = re.compile(f"(?=({_keyword_trie_pattern(trie)}))") if priority else None
+        self._categorize_cached = functools.lru_cache(maxsize=CATEGORY_CACHE_SIZE)(self._categorize_key)
+
+    def matches_rules(self, category_keywords):
+        """
+        Return True if this matcher was compiled from the given rules table.
+        """
+        return self.rules == category_keywords and self.rule_order == list(category_keywords)
+
+    def match_rule(self, desc_upper):
+        """
+        Return the index of the highest-priority rule whose keyword appears in the description, or None.
+        """
+        if self.pattern is None:
+            return None
+        found = self.pattern.findall(desc_upper)
+        return min(map(self.priority.__getitem__, found)) if found else None
+
+    def match_keyword(self, desc_upper):
+        """
+        Return the keyword behind match_rule's result, or None.
+        """
+        if self.pattern is None:
+            return None
+        found = self.pattern.findall(desc_upper)
+        return min(found, key=self.priority.__getitem__) if found else None
+
+    def keyword_outcome(self, keyword):
+        """
+        Return what matching keyword decides: (whether it is a paycheck rule, its category).
+        """
+        rule = self.priority[keyword]
+        return rule == 0, self.rule_category[rule]
+
+    def description_keyword(self, description):
+        """
+        Return the rule keyword that decides the description's category, or None.
+        """
+        return self.match_keyword(description.upper())
+
+    def categorize(self, description, amount):
+        """
+        Categorize a transaction (amount in integer cents) with the same priority order as the original keyword scan.
+        """
+        return self._categorize_cached(description.upper(), amount < 0, abs(amount) == RENT_AMOUNT_CENTS)
+
+    def classify(self, description, amount):
+        """
+        Return (category, matched rule keyword or None) for a transaction from a single keyword scan.
+        """
+        desc_upper = description.upper()
+        keyword = self.match_keyword(desc_upper)
+        rule = None if keyword is None else self.priority[keyword]
+        return self._category(rule, desc_upper, amount < 0, abs(amount) == RENT_AMOUNT_CENTS), keyword
+
+    def cache_info(self):
+        """
+        Return hit/miss statistics for the categorization cache.
+        """
+        return self._categorize_cached.cache_info()
+
+    def _categorize_key(self, desc_upper, is_expense, is_rent):
+        """
+        Categorize from the upper-cased description and the only amount features the rules use.
+        """
+        return self._category(self.match_rule(desc_upper), desc_upper, is_expense, is_rent)
+
+    def _category(self, rule, desc_upper, is_expense, is_rent):
+        """
+        Apply the category precedence to the matched rule index (or None).
+        """
+        # 1) Paycheck keywords first
+        if rule == 0:
+            return "Paychecks"
+
+        # 2) Refunds or returns — only if expense (negative amount)
+        if is_expense and "RETURN" in desc_upper:
+            return "Refunds"
+
+        # 3) Special rule for rent
+        if is_rent:
+            return "Rent/Utilities"
+
+        # 4) Transfers, then the other categories in CATEGORY_KEYWORDS order
+        if rule is not None:
+            return self.rule_category[rule]
+
+        # 5) Default to Miscellaneous
+        return "Miscellaneous"
+
+_category_matcher = None
+
+def get_category_matcher():
+    """
+    Return the compiled matcher for CATEGORY_KEYWORDS, rebuilding it if the rules changed.
+
+    The check compares the whole rules table, so loops fetch the matcher once per file
+    or batch and call its methods per row.
+    """
+    global _category_matcher
+    if _category_matcher is None or not _category_matcher.matches_rules(CATEGORY_KEYWORDS):
+        _category_matcher = CategoryMatcher(CATEGORY_KEYWORDS)
+    return _category_matcher
+
+def categorization_cache_info():
+    """
+    Return hit/miss statistics for the categorization cache of the current rules.
+    The cache starts empty whenever CATEGORY_KEYWORDS changes.
+    """
+    return get_category_matcher().cache_info()
+
+def rule_hit_stats(transactions, top=25):
+    """
+    Count transactions per category and per matched rule keyword.
+    """
+    matcher = get_category_matcher()
+    categories = Counter()
+    keywords = Counter()
+    for tx in transactions:
+        categories[tx['category']] += 1
+        keywords[matcher.match_keyword(tx['description'].upper()) or "(no keyword)"] += 1
+    return {"categories": dict(categories.most_common()), "keywords": dict(keywords.most_common(top))}
 
 def categorize_transaction(description, amount):
     """
-    Categorize a transaction based on its description and amount.
+    Categorize a transaction based on its description and amount in integer cents.
+    For many rows, bind get_category_matcher().categorize once instead.
+    """
+    return get_category_matcher().categorize(description, amount)
+
+def rule_keyword_matcher():
+    """
+    Return a description -> matched rule keyword function for the current rules.
+    """
+    return get_category_matcher().description_keyword
+
+def diff_rules(old, new):
+    """
+    Compare the CategoryMatchers of two rules tables. Returns (stale keywords, added keywords).
+
+    A transaction keeps its category and matched keyword under the new rules unless
+    that keyword is stale (removed, moved to a rule with another outcome, or overtaken
+    or newly tied by a keyword that ranked behind it) or its description contains an
+    added keyword.
     """
-    desc_upper = description.upper()
+    shared = [keyword for keyword in old.priority if keyword in new.priority]
+    stale = {
+        keyword for keyword in old.priority
+        if keyword not in new.priority or old.keyword_outcome(keyword) != new.keyword_outcome(keyword)
+    }
 
-    # 1) Check paycheck keywords first
-    paycheck_keywords = ["PAYROLL", "MOBILE DEPOSIT", "PAYCHECK", "SALARY", "DIRECT DEPOSIT", "GUSTO PAY"]
-    if any(keyword in desc_upper for keyword in paycheck_keywords):
-        return "Paychecks"
+    # Walk the shared keywords from the back of the old ranking, tracking the best new rank
+    # among those ranked strictly behind. A keyword is stale if one ranked at or behind it
+    # now ranks ahead, or one ranked behind it now ties.
+    by_old_rank = defaultdict(list)
+    for keyword in shared:
+        by_old_rank[old.priority[keyword]].append(keyword)
+    behind = float("inf")
+    for rank in sorted(by_old_rank, reverse=True):
+        group = by_old_rank[rank]
+        new_ranks = sorted(new.priority[keyword] for keyword in group)
+        for keyword in group:
+            now = new.priority[keyword]
+            # Best new rank among the other keywords that shared this old rank
+            tied = new_ranks[0] if now != new_ranks[0] else new_ranks[1] if len(new_ranks) > 1 else float("inf")
+            if min(behind, tied) < now or behind <= now:
+                stale.add(keyword)
+        behind = min(behind, new_ranks[0])
+    added = {keyword for keyword in new.priority if keyword not in old.priority}
+    return stale, added
 
-    # 2) Refunds or returns — only if expense (negative amount)
-    if "RETURN" in desc_upper and amount < 0:
-        return "Refunds"
+STATEMENT_DATE_RE = re.compile(r"(\d\d)/(\d\d)/(\d{4})", re.ASCII)
+PLAID_DATE_RE = re.compile(r"(\d{4})-(\d\d)-(\d\d)", re.ASCII)
+DECIMAL_AMOUNT_RE = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?", re.ASCII)
+AMOUNT_SYMBOLS = str.maketrans("", "", "$,")
 
-    # 3) Special rule for rent
-    if abs(amount) == 2500:
-        return "Rent/Utilities"
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_statement_date(date_str):
+    """
+    Parse a CSV 'MM/DD/YYYY' date into (datetime, display string), or (None, date_str) if invalid.
+    Zero-padded dates keep their original string; results are memoized per distinct string.
+    """
+    match = STATEMENT_DATE_RE.fullmatch(date_str)
+    if match:
+        month, day, year = match.groups()
+        try:
+            return datetime(int(year), int(month), int(day)), date_str
+        except ValueError:
+            return None, date_str
+    try:
+        date_obj = datetime.strptime(date_str, "%m/%d/%Y")
+    except ValueError:
+        return None, date_str
+    return date_obj, date_obj.strftime("%m/%d/%Y")
 
-    # 4) Transfers always
-    if any(keyword in desc_upper for keyword in ["TRANSFER"]):
-        return "Transfers"
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_plaid_date(date_str):
+    """
+    Parse a Plaid 'YYYY-MM-DD' date into (datetime, 'MM/DD/YYYY'), or (None, date_str) if invalid.
+    Results are memoized per distinct string.
+    """
+    match = PLAID_DATE_RE.fullmatch(date_str)
+    if match:
+        year, month, day = match.groups()
+        try:
+            return datetime(int(year), int(month), int(day)), f"{month}/{day}/{year}"
+        except ValueError:
+            return None, date_str
+    try:
+        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        return None, date_str
+    return date_obj, date_obj.strftime("%m/%d/%Y")
 
-    # 5) Other categories
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword in desc_upper:
-                return category
+def dollars_to_cents(value):
+    """
+    Convert a dollar amount (int, float or string like '-12.34') to integer cents.
+    Sub-cent digits round half away from zero; raises ValueError for non-numeric input.
+    """
+    if isinstance(value, int):
+        return value * 100
+    text = repr(value) if isinstance(value, float) else str(value).strip()
+    match = DECIMAL_AMOUNT_RE.fullmatch(text)
+    if match:
+        sign, whole, fraction = match.groups()
+        if (whole or fraction) and len(fraction or "") <= 2:
+            cents = int(whole or 0) * 100 + int((fraction or "").ljust(2, "0"))
+            return -cents if sign == "-" else cents
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}") from None
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    return int((amount * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
 
-    # 6) Default to Miscellaneous
-    return "Miscellaneous"
+@functools.lru_cache(maxsize=AMOUNT_CACHE_SIZE)
+def parse_amount_cents(amt_str):
+    """
+    Parse a statement amount such as '-12.34', '$1,234.56' or '(12.34)' into integer cents.
+    Unparseable amounts are 0.
+    """
+    try:
+        # Plain numbers need no cleanup
+        return dollars_to_cents(amt_str)
+    except ValueError:
+        pass
+    amt_str = amt_str.translate(AMOUNT_SYMBOLS).strip()
+    negative = amt_str.startswith('(') and amt_str.endswith(')')
+    try:
+        cents = dollars_to_cents(amt_str.strip('()') if negative else amt_str)
+    except ValueError:
+        return 0
+    return -cents if negative else cents
 
-def load_transactions(filename):
+def iter_transactions(filename):
     """
-    Load transactions from a CSV file and categorize them.
+    Yield categorized transactions from a CSV file one row at a time.
     """
-    transactions = []
+    categorize = get_category_matcher().categorize
+    excluded = [excl for excl in EXCLUDE_DESCRIPTIONS if excl != "TRANSFER"]
     with open(filename, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
+        reader = csv.reader(csvfile)
+        header = next(reader, None)
+        if header is None:
+            return
+        # Like csv.DictReader, the last column with a given name wins
+        columns = {name: i for i, name in enumerate(header)}
+        posted_col = columns.get('Posted Date')
+        date_col = columns.get('Date')
+        amount_col = columns.get('Amount')
+        desc_col = columns.get('Description')
+
+        def field(row, col):
+            return row[col] if col is not None and col < len(row) else ''
+
         for row in reader:
-            date_str = row.get('Posted Date', '') or row.get('Date', '')
-            try:
-                date_obj = datetime.strptime(date_str, "%m/%d/%Y")
-                date_formatted = date_obj.strftime("%m/%d/%Y")
-            except ValueError:
-                date_obj = None
-                date_formatted = date_str
-
-            amt_str = row.get('Amount', '').replace('$', '').replace(',', '').strip()
-            if amt_str.startswith('(') and amt_str.endswith(')'):
-                try:
-                    amt = -float(amt_str.strip('()'))
-                except ValueError:
-                    amt = 0.0
-            else:
-                try:
-                    amt = float(amt_str)
-                except ValueError:
-                    amt = 0.0
+            if not row:
+                continue
+            date_obj, date_formatted = parse_statement_date(field(row, posted_col) or field(row, date_col))
+            amt = parse_amount_cents(field(row, amount_col))
 
-            desc = row.get('Description', '').strip()
-            if any(excl in desc.upper() for excl in EXCLUDE_DESCRIPTIONS if excl != "TRANSFER"):
+            desc = field(row, desc_col).strip()
+            desc_upper = desc.upper()
+            if any(excl in desc_upper for excl in excluded):
                 continue
-            category = categorize_transaction(desc, amt)
-            transactions.append({
+            category = categorize(desc, amt)
+            yield {
                 'date': date_formatted,
                 'description': desc,
                 'amount': amt,
                 'category': category,
                 'DateObj': date_obj
-            })
-    return transactions
+            }
 
-def load_plaid_json(file_path):
+def load_transactions(filename):
     """
-    Load transactions from a Plaid JSON file and categorize them.
+    Load transactions from a CSV file and categorize them.
+    """
+    return list(iter_transactions(filename))
+
+def iter_json_array(f, chunk_size=JSON_CHUNK_SIZE):
+    """
+    Yield the elements of a JSON array from a text file, reading chunk_size characters at a time.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    started = False
+    while True:
+        # Skip whitespace (and commas once inside the array), refilling the buffer when it runs out
+        separators = " \t\r\n," if started else " \t\r\n"
+        while True:
+            while pos < len(buf) and buf[pos] in separators:
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            buf, pos = f.read(chunk_size), 0
+            eof = not buf
+        if not started:
+            if pos >= len(buf) or buf[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if pos >= len(buf):
+            raise ValueError("Unterminated JSON array")
+        if buf[pos] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = None
+        # A value is complete only once a delimiter follows it: one ending at the buffer
+        # edge, or a number split across chunks ('1.' of '1.5'), may go on in the next chunk
+        if end is None or end >= len(buf) or buf[end] not in JSON_ELEMENT_DELIMITERS:
+            if eof:
+                raise ValueError("Malformed or unterminated JSON array")
+            more = f.read(chunk_size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield obj
+        pos = end
+
+def iter_plaid_records(file_path):
+    """
+    Yield raw Plaid transaction records from an export one at a time.
+    Newline-delimited exports are read line by line; legacy JSON arrays are decoded incrementally.
     """
     with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    transactions = []
-    for tx in data:
-        date_str = tx.get("date", "")
+        is_array = f.read(JSON_CHUNK_SIZE).lstrip().startswith("[")
+        f.seek(0)
+        if is_array:
+            yield from iter_json_array(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def plaid_tombstone(transaction_id):
+    """
+    Return the record a sync ledger keeps for a transaction that /transactions/sync removed.
+    """
+    return {"transaction_id": transaction_id, "removed": True}
+
+def compact_plaid_record(tx):
+    """
+    Trim a Plaid transaction to the fields the parser reads.
+    """
+    if tx.get("removed"):
+        return plaid_tombstone(tx["transaction_id"])
+    return {field: tx.get(field) for field in PLAID_EXPORT_FIELDS}
+
+def write_plaid_records(f, records):
+    """
+    Write Plaid transactions to an open file as compact newline-delimited records.
+    Returns the number of records written.
+    """
+    count = 0
+    for tx in records:
+        f.write(json.dumps(compact_plaid_record(tx), separators=(",", ":"), default=str) + "\n")
+        count += 1
+    return count
+
+def merge_plaid_records(file_paths):
+    """
+    Merge the records of several Plaid exports, ordered oldest to newest, keeping the
+    latest version of each transaction_id. An id index makes the merge linear in the
+    total number of records. Records without an id are all kept.
+
+    A transaction with a tombstone in any export, left by a sync that saw it removed,
+    is dropped, so older full exports cannot bring it back.
+    """
+    merged = {}
+    removed = set()
+    for file_path in file_paths:
+        for i, tx in enumerate(iter_plaid_records(file_path)):
+            if tx.get("removed"):
+                removed.add(tx["transaction_id"])
+            else:
+                merged[tx.get("transaction_id") or (file_path, i)] = tx
+    return [tx for key, tx in merged.items() if key not in removed]
+
+def iter_plaid_transactions(records):
+    """
+    Categorize raw Plaid records one row at a time.
+    """
+    categorize = get_category_matcher().categorize
+    for tx in records:
+        date_obj, date_formatted = parse_plaid_date(tx.get("date", ""))
         try:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-            date_formatted = date_obj.strftime("%m/%d/%Y")
+            amt = dollars_to_cents(tx.get("amount", 0))
         except ValueError:
-            date_obj = None
-            date_formatted = date_str
-
-        amt = float(tx.get("amount", 0.0))
+            amt = 0
         desc = tx.get("name", "")
-        category = categorize_transaction(desc, amt)
-        transactions.append({
+        category = categorize(desc, amt)
+        yield {
             "date": date_formatted,
             "DateObj": date_obj,
             "description": desc,
             "amount": amt,
             "category": category
-        })
-    return transactions
+        }
+
+def iter_plaid_json(file_path):
+    """
+    Yield categorized transactions from a Plaid export one row at a time.
+    """
+    return iter_plaid_transactions(tx for tx in iter_plaid_records(file_path) if not tx.get("removed"))
+
+def load_plaid_json(file_path):
+    """
+    Load transactions from a Plaid JSON file and categorize them.
+    """
+    return list(iter_plaid_json(file_path))
+
+def load_plaid_exports(file_paths):
+    """
+    Load and categorize the transactions of several Plaid exports merged by transaction_id.
+    """
+    return list(iter_plaid_transactions(merge_plaid_records(file_paths)))
+
+def get_plaid_json_files(folder_path):
+    """
+    Return every Plaid export (newline-delimited or legacy JSON array) in the folder, oldest first.
+    """
+    json_files = glob.glob(os.path.join(folder_path, "plaid_*.ndjson")) + glob.glob(os.path.join(folder_path, "plaid_*.json"))
+    return sorted(json_files, key=lambda path: (os.path.getmtime(path), path))
 
 def get_latest_plaid_json_file(folder_path):
     """
-    Get the most recent Plaid JSON file from the folder.
+    Get the most recent Plaid export (newline-delimited or legacy JSON array) from the folder.
     """
-    pattern = os.path.join(folder_path, "plaid_*.json")
-    json_files = glob.glob(pattern)
+    json_files = get_plaid_json_files(folder_path)
     if not json_files:
         raise FileNotFoundError("No Plaid JSON files found")
-    return max(json_files, key=os.path.getmtime)
+    return json_files[-1]
+
+def rules_table():
+    """
+    Return the categorization rules as JSON text.
+    """
+    return json.dumps([
+        LEDGER_CACHE_VERSION,
+        PAYCHECK_KEYWORDS,
+        TRANSFER_KEYWORDS,
+        EXCLUDE_DESCRIPTIONS,
+        list(CATEGORY_KEYWORDS.items()),
+    ])
+
+def rules_matcher(rules):
+    """
+    Compile a CategoryMatcher from rules_table text, such as rules recorded by an earlier run.
+    """
+    _, paycheck_keywords, transfer_keywords, _, category_keywords = json.loads(rules)
+    return CategoryMatcher(dict(category_keywords), paycheck_keywords, transfer_keywords)
+
+def rules_fingerprint(rules=None):
+    """
+    Hash the categorization rules (rules_table text, the current rules by default)
+    so cached results can be invalidated when they change.
+    """
+    return hashlib.sha256((rules or rules_table()).encode("utf-8")).hexdigest()
+
+def file_sha256(file_path):
+    """
+    Hash a file's contents in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def transaction_sort_key(tx):
+    """
+    Sort key ordering transactions by date, with undated rows first.
+    """
+    return tx['DateObj'] or datetime.min
 
-def load_all_transactions_from_folder(folder_path):
+def write_sorted_run(path, transactions):
     """
-    Load all CSV and latest Plaid JSON transactions from the folder, sorted by date.
+    Write transactions to path as newline-delimited JSON, stably sorted by date.
+    Returns the sorted list.
     """
-    all_transactions = []
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".csv"):
-            file_path = os.path.join(folder_path, filename)
+    transactions = sorted(transactions, key=transaction_sort_key)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for tx in transactions:
+            row = tx.copy()
+            row["DateObj"] = tx["DateObj"].isoformat() if tx["DateObj"] else None
+            f.write(json.dumps(row) + "\n")
+    os.replace(tmp_path, path)
+    return transactions
+
+def iter_sorted_run(path):
+    """
+    Yield the transactions stored in a sorted run one line at a time.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            tx = json.loads(line)
+            if tx["DateObj"]:
+                tx["DateObj"] = datetime.fromisoformat(tx["DateObj"])
+            yield tx
+
+class IngestionCache:
+    """
+    Manifest of already-parsed statement files and their categorized transactions.
+
+    The manifest records each file's size, mtime and content hash next to the
+    fingerprint of the rules used to categorize it. Each file's rows are cached as a
+    date-sorted run, so unchanged files load from the cache (or stream straight into
+    a k-way merge); new or modified files, or any file after a rules change, are
+    parsed again.
+    """
+
+    def __init__(self, folder_path, cache_dir=None):
+        self.cache_dir = cache_dir or os.path.join(folder_path, LEDGER_CACHE_DIR)
+        self.manifest_path = os.path.join(self.cache_dir, "manifest.json")
+        self.rules = rules_fingerprint()
+        self.files = {}
+        self.seen = set()
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        if manifest.get("rules") == self.rules:
+            self.files = manifest.get("files", {})
+
+    def get(self, file_path):
+        """
+        Return the cached transactions for file_path sorted by date, or None if it must be parsed.
+        """
+        run_path, cached = self._lookup(file_path)
+        if not cached:
+            return None
+        try:
+            transactions = list(iter_sorted_run(run_path))
+        except (OSError, ValueError):
+            return None
+        self.hits += 1
+        return transactions
+
+    def get_run(self, file_path):
+        """
+        Return the path of the cached sorted run for file_path, or None if it must be parsed.
+        """
+        run_path, cached = self._lookup(file_path)
+        if not cached:
+            return None
+        self.hits += 1
+        return run_path
+
+    def put(self, file_path, transactions):
+        """
+        Cache freshly parsed transactions for file_path and return them sorted by date.
+        """
+        self.misses += 1
+        run_path, _ = self._lookup(file_path)
+        return write_sorted_run(run_path, transactions)
+
+    def run_file(self, file_path):
+        """
+        Return the path of the sorted run recorded for file_path.
+        """
+        return self._lookup(file_path)[0]
+
+    def save(self):
+        """
+        Persist the manifest for the files loaded this run and drop cached results no longer referenced.
+        """
+        files = {key: entry for key, entry in self.files.items() if key in self.seen}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        write_json_atomic(self.manifest_path, {"rules": self.rules, "files": files})
+        referenced = {f"{entry['sha256']}.ndjson" for entry in files.values()}
+        for name in os.listdir(self.cache_dir):
+            if name != "manifest.json" and name not in referenced:
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def _file_sha256(self, file_path):
+        """
+        Record file_path in the manifest and return (content hash, whether it was already recorded).
+        """
+        stat = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        entry = self.files.get(key)
+        self.seen.add(key)
+
+        if entry and (entry["size"], entry["mtime"]) == (stat.st_size, stat.st_mtime):
+            return entry["sha256"], True
+        sha256 = file_sha256(file_path)
+        self.files[key] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha256}
+        return sha256, bool(entry) and entry["sha256"] == sha256
+
+    def _lookup(self, file_path):
+        """
+        Record file_path in the manifest and return (run path, whether that run is current).
+        A tuple of paths is one source, such as the merged Plaid exports, cached as one run.
+        """
+        if isinstance(file_path, tuple):
+            digests = [self._file_sha256(path)[0] for path in file_path]
+            sha256 = hashlib.sha256("\n".join(digests).encode("utf-8")).hexdigest()
+            key = "merged:" + "|".join(os.path.abspath(path) for path in file_path)
+            cached = self.files.get(key, {}).get("sha256") == sha256
+            self.files[key] = {"sha256": sha256}
+            self.seen.add(key)
+        else:
+            sha256, cached = self._file_sha256(file_path)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        run_path = os.path.join(self.cache_dir, f"{sha256}.ndjson")
+        return run_path, cached and os.path.exists(run_path)
+
+def list_statement_files(folder_path):
+    """
+    Return (file path, loader) for every statement CSV in the folder (not our own
+    daily CSV exports), plus one (paths, loader)
+    source that merges all Plaid exports by transaction_id.
+    """
+    files = [
+        (os.path.join(folder_path, filename), load_transactions)
+        for filename in os.listdir(folder_path)
+        if filename.endswith(".csv") and not EXPORT_CSV_RE.fullmatch(filename)
+    ]
+    plaid_files = get_plaid_json_files(folder_path)
+    if plaid_files:
+        files.append((tuple(plaid_files), load_plaid_exports))
+    return files
+
+def source_paths(file_path):
+    """
+    Return the files behind a statement source: a single path or a tuple of merged paths.
+    """
+    return file_path if isinstance(file_path, tuple) else (file_path,)
+
+def iter_statement_files(folder_path):
+    """
+    Yield the statement sources of list_statement_files, announcing each one.
+    """
+    files = list_statement_files(folder_path)
+    for file_path, loader in files:
+        if loader is load_transactions:
             print(f"Loading CSV: {file_path}...")
-            all_transactions.extend(load_transactions(file_path))
-    try:
-        latest_json_file = get_latest_plaid_json_file(folder_path)
-        print(f"Loading latest Plaid JSON: {latest_json_file}...")
-        all_transactions.extend(load_plaid_json(latest_json_file))
-    except FileNotFoundError:
+        else:
+            print(f"Merging {len(file_path)} Plaid JSON exports: {', '.join(file_path)}...")
+        yield file_path, loader
+    if not files or files[-1][1] is not load_plaid_exports:
         print("No Plaid JSON files found, skipping JSON load.")
-    all_transactions.sort(key=lambda tx: tx['DateObj'] or datetime.min)
-    return all_transactions
 
-def summarize_by_category(transactions):
+def parse_statement(task):
     """
-    Summarize transactions amounts by category, accounting for refunds.
+    Parse one (file path, loader) task into transactions sorted by date.
     """
-    category_sums = {}
+    file_path, loader = task
+    return sorted(loader(file_path), key=transaction_sort_key)
 
-    for tx in transactions:
+def parse_statements(tasks, workers=1):
+    """
+    Yield the sorted transactions of each (file path, loader) task in order.
+    With workers > 1 the files are parsed across a process pool.
+    """
+    if workers > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            yield from pool.map(parse_statement, tasks)
+    else:
+        yield from map(parse_statement, tasks)
+
+def load_all_transactions_from_folder(folder_path, use_cache=True, workers=1):
+    """
+    Load all CSV and merged Plaid JSON transactions from the folder, sorted by date.
+    Unchanged files are read from the ingestion cache unless use_cache is False,
+    and the rest are parsed across `workers` processes.
+    """
+    cache = IngestionCache(folder_path) if use_cache else None
+    tasks = list(iter_statement_files(folder_path))
+    runs = [cache.get(file_path) if cache else None for file_path, _ in tasks]
+
+    parsed = parse_statements([task for task, run in zip(tasks, runs) if run is None], workers)
+    for i, run in enumerate(runs):
+        if run is None:
+            transactions = next(parsed)
+            runs[i] = cache.put(tasks[i][0], transactions) if cache else transactions
+
+    if cache:
+        cache.save()
+        print(f"Ingestion cache: {cache.hits} unchanged, {cache.misses} parsed.")
+    return list(heapq.merge(*runs, key=transaction_sort_key))
+
+def iter_all_transactions_from_folder(folder_path, use_cache=True, workers=1):
+    """
+    Stream all CSV and merged Plaid JSON transactions from the folder in date order.
+    Each file becomes a date-sorted run on disk and the runs are k-way merged, so
+    memory holds one file while parsing and one row per file while merging.
+    """
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        cache = IngestionCache(folder_path, None if use_cache else scratch_dir)
+        tasks = list(iter_statement_files(folder_path))
+        run_paths = [cache.get_run(file_path) for file_path, _ in tasks]
+
+        parsed = parse_statements([task for task, run in zip(tasks, run_paths) if run is None], workers)
+        for i, run_path in enumerate(run_paths):
+            if run_path is None:
+                cache.put(tasks[i][0], next(parsed))
+                run_paths[i] = cache.run_file(tasks[i][0])
+
+        if use_cache:
+            cache.save()
+            print(f"Ingestion cache: {cache.hits} unchanged, {cache.misses} parsed.")
+        yield from heapq.merge(*map(iter_sorted_run, run_paths), key=transaction_sort_key)
+
+class CategoryTotals:
+    """
+    Running per-category totals, accounting for refunds, fed one transaction at a time.
+    """
+
+    def __init__(self):
+        self.sums = {}
+
+    def add(self, tx):
         amt = tx.get('amount', 0)
         cat = tx.get('category', 'Miscellaneous')
         desc = tx.get('description', '').upper()
 
         # Skip Transfers from income/expense summaries
         if cat == "Transfers":
-            continue
+            return
 
         # Check if transaction is a refund
         is_refund = any(keyword in desc for keyword in REFUND_KEYWORDS)
 
         if is_refund:
             # Refunds reduce expenses, so subtract absolute amount
-            category_sums[cat] = category_sums.get(cat, 0) - abs(amt)
+            self.sums[cat] = self.sums.get(cat, 0) - abs(amt)
         else:
             # Normal transactions add their amount
-            category_sums[cat] = category_sums.get(cat, 0) + amt
+            self.sums[cat] = self.sums.get(cat, 0) + amt
+
+def as_columnar(transactions):
+    """
+    Return transactions as a ColumnarLedger, or None when numpy is not installed or
+    a list is shorter than COLUMNAR_MIN_ROWS. numpy is only imported once a ledger is built.
+    """
+    if isinstance(transactions, ColumnarLedger):
+        return transactions
+    if not NUMPY_AVAILABLE or (isinstance(transactions, list) and len(transactions) < COLUMNAR_MIN_ROWS):
+        return None
+    return ColumnarLedger.from_transactions(transactions, REFUND_KEYWORDS)
 
-    return category_sums
+def summarize_by_category(transactions):
+    """
+    Summarize transaction amounts (in cents) by category, accounting for refunds.
+    """
+    ledger = as_columnar(transactions)
+    if ledger is not None:
+        return ledger.category_totals()
+    totals = CategoryTotals()
+    for tx in transactions:
+        totals.add(tx)
+    return totals.sums
 
 def print_transactions(transactions):
     """
     Print all transactions with date, description, amount, and category.
     """
     for tx in transactions:
-        print(f"{tx['date']} | {tx['description']} | ${tx['amount']:.2f} | {tx['category']}")
+        print(f"{tx['date']} | {tx['description']} | ${format_cents(tx['amount'])} | {tx['category']}")
 
 def print_income_expense_summary(category_sums):
     """
@@ -227,11 +951,11 @@ def print_income_expense_summary(category_sums):
 
     print("\nIncome totals by category (Paychecks and Cash Income):")
     for category, total in sorted(income.items(), key=lambda x: x[1], reverse=True):
-        print(f"{category}: ${total:.2f}")
+        print(f"{category}: ${format_cents(total)}")
 
     print("\nExpense totals by category (largest to smallest):")
     for category, total in sorted(expenses.items(), key=lambda x: abs(x[1]), reverse=True):
-        print(f"{category}: ${-total:.2f}")
+        print(f"{category}: ${format_cents(-total)}")
 
 def print_category_transactions(transactions, category_name):
     """
@@ -240,7 +964,7 @@ def print_category_transactions(transactions, category_name):
     print(f"\n--- {category_name} Transactions ---")
     for tx in transactions:
         if tx['category'] == category_name:
-            print(f"{tx['date']}: {tx['description']} - ${tx['amount']:.2f}")
+            print(f"{tx['date']}: {tx['description']} - ${format_cents(tx['amount'])}")
 
 def print_transfers(transactions):
     """
@@ -249,33 +973,49 @@ def print_transfers(transactions):
     print("\n--- Transfers ---")
     for tx in transactions:
         if tx['category'] == "Transfers":
-            print(f"{tx['date']}: {tx['description']} - ${tx['amount']:.2f}")
+            print(f"{tx['date']}: {tx['description']} - ${format_cents(tx['amount'])}")
 
 def print_total_expenses(transactions):
     """
     Print total expenses (absolute value), excluding transfers.
+    A single pass is cheaper than building columns, so only an existing ColumnarLedger is used.
     """
+    if isinstance(transactions, ColumnarLedger):
+        print(f"\nTOTAL EXPENSES: ${format_cents(transactions.total_expenses())}")
+        return
     total = sum(abs(tx['amount']) for tx in transactions if tx['amount'] < 0 and tx['category'] != "Transfers")
-    print(f"\nTOTAL EXPENSES: ${total:.2f}")
+    print(f"\nTOTAL EXPENSES: ${format_cents(total)}")
 
-from datetime import date, timedelta
-
-def print_weekly_summary(transactions):
+class WeeklyTotals:
     """
-    Print summaries for only the current week and the previous week.
+    Running per-ISO-week category totals, fed one transaction at a time.
     """
-    weekly_data = defaultdict(lambda: defaultdict(float))
-    for tx in transactions:
+
+    def __init__(self):
+        self.weeks = defaultdict(lambda: defaultdict(int))
+
+    def add(self, tx):
         date_obj = tx.get('DateObj')
         if not date_obj:
-            continue
+            return
         year, week, _ = date_obj.isocalendar()
         cat = tx.get('category', 'Miscellaneous')
         amt = tx.get('amount', 0)
         if cat == "Transfers":
-            continue
-        weekly_data[(year, week)][cat] += amt
+            return
+        self.weeks[(year, week)][cat] += amt
+
+    def print_summary(self, all_weeks=False):
+        """
+        Print summaries for only the current week and the previous week, or every week with all_weeks.
+        """
+        print_weekly_totals(self.weeks, all_weeks)
 
+def print_weekly_totals(weeks, all_weeks=False):
+    """
+    Print {(year, week): {category: total}} for only the current week and the previous week,
+    or for every week with all_weeks (used when the ledger is already sliced to a date range).
+    """
     # Get current and previous week numbers
     today = date.today()
     current_year, current_week, _ = today.isocalendar()
@@ -283,36 +1023,60 @@ def print_weekly_summary(transactions):
     prev_year, prev_week, _ = last_week.isocalendar()
 
     # Only show current and previous week
-    for (year, week) in sorted(weekly_data.keys()):
-        if (year, week) in [(prev_year, prev_week), (current_year, current_week)]:
+    for (year, week) in sorted(weeks.keys()):
+        if all_weeks or (year, week) in [(prev_year, prev_week), (current_year, current_week)]:
             print(f"\n=== Week {week} of {year} ===")
-            cat_totals = weekly_data[(year, week)]
+            cat_totals = weeks[(year, week)]
             sorted_cats = sorted(cat_totals.items(), key=lambda x: abs(x[1]), reverse=True)
             for category, total in sorted_cats:
-                print(f"{category}: ${total:.2f}")
+                print(f"{category}: ${format_cents(total)}")
             print("------------------------")
             total_for_week = sum(cat_totals.values())
-            print(f"TOTAL: ${total_for_week:.2f}")
+            print(f"TOTAL: ${format_cents(total_for_week)}")
 
-def print_monthly_summary(transactions):
+def print_weekly_summary(transactions, all_weeks=False):
     """
-    Print monthly income and expense summaries similar to weekly summary style.
+    Print summaries for only the current week and the previous week, or every week with all_weeks.
     """
-    monthly_groups = defaultdict(list)
+    ledger = as_columnar(transactions)
+    if ledger is not None:
+        print_weekly_totals(ledger.weekly_totals(), all_weeks)
+        return
+    totals = WeeklyTotals()
     for tx in transactions:
+        totals.add(tx)
+    totals.print_summary(all_weeks)
+
+class MonthlyTotals:
+    """
+    Running per-month category totals, fed one transaction at a time.
+    """
+
+    def __init__(self):
+        self.months = defaultdict(lambda: defaultdict(int))
+
+    def add(self, tx):
         if tx['DateObj']:
             month_str = tx['DateObj'].strftime('%Y-%m')
         else:
             month_str = 'Unknown'
-        monthly_groups[month_str].append(tx)
+        category_sums = self.months[month_str]
+        if tx['category'] == 'Transfers':
+            return
+        category_sums[tx['category']] += tx['amount']
 
-    for month in sorted(monthly_groups.keys()):
-        month_txs = monthly_groups[month]
-        category_sums = defaultdict(float)
-        for tx in month_txs:
-            if tx['category'] == 'Transfers':
-                continue
-            category_sums[tx['category']] += tx['amount']
+    def print_summary(self):
+        """
+        Print monthly income and expense summaries similar to weekly summary style.
+        """
+        print_monthly_totals(self.months)
+
+def print_monthly_totals(months):
+    """
+    Print {'YYYY-MM': {category: total}} as monthly income and expense summaries.
+    """
+    for month in sorted(months.keys()):
+        category_sums = months[month]
 
         income = {cat: amt for cat, amt in category_sums.items() if amt > 0}
         expenses = {cat: amt for cat, amt in category_sums.items() if amt < 0}
@@ -325,68 +1089,747 @@ def print_monthly_summary(transactions):
 
         print("\nIncome (largest to smallest):")
         for category, total in sorted(income.items(), key=lambda x: x[1], reverse=True):
-            print(f"  {category}: ${total:.2f}")
+            print(f"  {category}: ${format_cents(total)}")
 
         print("\nExpenses (largest to smallest):")
         for category, total in sorted(expenses.items(), key=lambda x: abs(x[1]), reverse=True):
-            print(f"  {category}: ${-total:.2f}")
+            print(f"  {category}: ${format_cents(-total)}")
 
         print("-" * 30)
-        print(f"Total Income:  ${sum(income.values()):.2f}")
-        print(f"Total Expense: ${-sum(expenses.values()):.2f}\n")
+        print(f"Total Income:  ${format_cents(sum(income.values()))}")
+        print(f"Total Expense: ${format_cents(-sum(expenses.values()))}\n")
+
+def print_monthly_summary(transactions):
+    """
+    Print monthly income and expense summaries similar to weekly summary style.
+    """
+    ledger = as_columnar(transactions)
+    if ledger is not None:
+        print_monthly_totals(ledger.monthly_totals())
+        return
+    totals = MonthlyTotals()
+    for tx in transactions:
+        totals.add(tx)
+    totals.print_summary()
+
+DIGITS_RE = re.compile(r'\d+')
+WHITESPACE_RE = re.compile(r'\s+')
 
 def normalize_description(desc):
     """
     Normalize description for deduplication: lowercase, remove digits, normalize spaces.
     """
     desc = desc.lower()
-    desc = re.sub(r'\d+', '', desc)
-    desc = re.sub(r'\s+', ' ', desc).strip()
+    desc = DIGITS_RE.sub('', desc)
+    desc = WHITESPACE_RE.sub(' ', desc).strip()
     return desc
 
-def deduplicate_transactions(transactions):
+normalize_description_cached = functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)(normalize_description)
+
+class DedupIndex:
     """
-    Remove duplicate transactions based on date, amount (rounded), and normalized description.
+    Hash index of kept transactions for duplicate detection.
+
+    Kept rows are bucketed by (amount in cents, day number) and hold the set of
+    normalized descriptions seen there. A row is a duplicate if its description is
+    already in its own bucket or, with window_days > 0, in the bucket of a
+    neighboring day within the window. Each check is O(window) hash lookups.
+    """
+
+    def __init__(self, window_days=0):
+        # A negative window would check no days at all, not even the row's own
+        assert window_days >= 0, f"window_days must not be negative: {window_days}"
+        self.window_days = window_days
+        self.buckets = defaultdict(set)
+        self.skipped = 0
+        self.examples = []
+
+    def _day(self, tx):
+        # Undated rows fall back to their raw date string and never match across days
+        date_obj = tx.get('DateObj')
+        return date_obj.toordinal() if date_obj else tx.get('date')
+
+    def is_duplicate(self, tx):
+        """
+        Return True if tx duplicates a kept row; otherwise index it as kept and return False.
+        """
+        amount = tx.get('amount', 0)
+        day = self._day(tx)
+        desc = normalize_description_cached(tx.get('description', ''))
+
+        offsets = range(-self.window_days, self.window_days + 1) if isinstance(day, int) else (0,)
+        for offset in offsets:
+            bucket = self.buckets.get((amount, day + offset if offset else day))
+            if bucket and desc in bucket:
+                self.skipped += 1
+                if len(self.examples) < DEDUP_LOG_EXAMPLES:
+                    self.examples.append(tx)
+                return True
+
+        self.buckets[(amount, day)].add(desc)
+        return False
+
+    def log_summary(self):
+        """
+        Write the skipped-duplicate summary to the log and print a one-line count.
+        """
+        if not self.skipped:
+            return
+        logging.info(f"Skipped {self.skipped} duplicate transactions (date window ±{self.window_days} days)")
+        for tx in self.examples:
+            logging.info(f"Skipped duplicate: {tx['date']} | {tx['description']} | ${format_cents(tx['amount'])}")
+        if self.skipped > len(self.examples):
+            logging.info(f"... and {self.skipped - len(self.examples)} more")
+        log_files = [
+            os.path.relpath(handler.baseFilename)
+            for handler in logging.getLogger().handlers
+            if isinstance(handler, logging.FileHandler)
+        ]
+        details = f" (details in {log_files[0]})" if log_files else ""
+        print(f"🟡 Skipped {self.skipped} duplicate transactions{details}")
+
+def iter_deduplicated(transactions, window_days=0, index=None):
     """
-    seen = set()
-    deduped = []
+    Filter a transaction stream, dropping duplicates by date, amount in cents, and normalized description.
+    With window_days > 0, rows whose dates are up to that many days apart also count as duplicates.
+    """
+    index = index or DedupIndex(window_days)
     for tx in transactions:
-        key = (
-            tx.get('date'),
-            round(tx.get('amount', 0.0), 2),  # fixed default from 2 to 0.0
-            normalize_description(tx.get('description', ''))
+        if not index.is_duplicate(tx):
+            yield tx
+    index.log_summary()
+
+def deduplicate_transactions(transactions, window_days=0):
+    """
+    Remove duplicate transactions based on date, amount in cents, and normalized description.
+    """
+    return list(iter_deduplicated(transactions, window_days))
+
+def transaction_day(tx):
+    """
+    Return the transaction's day number (date ordinal), or NO_DAY when it has no date.
+    """
+    return tx['DateObj'].toordinal() if tx.get('DateObj') else NO_DAY
+
+class DateIndex:
+    """
+    Day numbers kept parallel to a date-sorted ledger, for date-range slices in O(log n + k).
+
+    Undated rows sort first with day NO_DAY and fall outside every range. insert()
+    bisects a new row into both lists, so the ledger stays sorted as it grows.
+    """
+
+    def __init__(self, transactions):
+        self.transactions = transactions
+        self.days = [transaction_day(tx) for tx in transactions]
+
+    def append(self, tx):
+        """
+        Add a row known to sort after every indexed row.
+        """
+        self.transactions.append(tx)
+        self.days.append(transaction_day(tx))
+
+    def insert(self, tx):
+        day = transaction_day(tx)
+        i = bisect.bisect_right(self.days, day)
+        self.days.insert(i, day)
+        self.transactions.insert(i, tx)
+
+    def slice(self, start=None, end=None):
+        """
+        Return the transactions dated from start through end (dates, either may be None).
+        """
+        lo = bisect.bisect_left(self.days, start.toordinal() if start else NO_DAY + 1)
+        hi = bisect.bisect_right(self.days, end.toordinal()) if end else len(self.days)
+        return self.transactions[lo:hi]
+
+def in_date_range(tx, start=None, end=None):
+    day = transaction_day(tx)
+    return day != NO_DAY and (not start or day >= start.toordinal()) and (not end or day <= end.toordinal())
+
+def parse_date_arg(text):
+    """
+    Parse a --from/--to date given as YYYY-MM-DD or MM/DD/YYYY.
+    """
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date: {text} (use YYYY-MM-DD or MM/DD/YYYY)")
+
+def positive_int(text):
+    """
+    Parse a count argument such as --weeks N, which must be at least 1.
+    """
+    value = int(text)
+    if value < 1:
+        raise ValueError(f"Expected a positive integer: {text}")
+    return value
+
+def non_negative_int(text):
+    """
+    Parse a count argument such as --dedup-window N, which may be 0 but not negative.
+    """
+    value = int(text)
+    if value < 0:
+        raise ValueError(f"Expected a non-negative integer: {text}")
+    return value
+
+def positive_float(text):
+    """
+    Parse an interval argument such as --watch SECONDS, which must be finite and above 0.
+    """
+    value = float(text)
+    if not 0 < value < float("inf"):
+        raise ValueError(f"Expected a positive number: {text}")
+    return value
+
+def parse_month_name(name):
+    """
+    Return the month number of a full or abbreviated English month name.
+    """
+    for fmt in ("%B", "%b"):
+        try:
+            return datetime.strptime(name.title(), fmt).month
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid month name: {name}")
+
+def parse_month_arg(text, today=None):
+    """
+    Return the (first day, last day) of a --month given as 'July', 'Jul 2025' or '2025-07'.
+    A month without a year means its most recent occurrence up to today.
+    """
+    today = today or date.today()
+    parts = text.replace(",", " ").split()
+    try:
+        if len(parts) == 1 and "-" in parts[0]:
+            first = datetime.strptime(parts[0], "%Y-%m").date()
+        else:
+            month = parse_month_name(parts[0])
+            year = int(parts[1]) if len(parts) > 1 else today.year - (month > today.month)
+            first = date(year, month, 1)
+    except (ValueError, IndexError):
+        raise ValueError(f"Invalid month: {text} (use e.g. July, 'July 2025' or 2025-07)")
+    next_month = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+    return first, next_month - timedelta(days=1)
+
+def resolve_date_range(month=None, start=None, end=None, weeks=None, today=None):
+    """
+    Combine --month, --from/--to and --weeks into one (start, end) date range, or None when
+    no filter is given. Several filters intersect; an open end is None.
+    """
+    today = today or date.today()
+    starts, ends = [start] if start else [], [end] if end else []
+    if month:
+        first, last = parse_month_arg(month, today)
+        starts.append(first)
+        ends.append(last)
+    if weeks:
+        # The current ISO week plus the weeks - 1 before it
+        starts.append(today - timedelta(days=today.weekday(), weeks=weeks - 1))
+    if not starts and not ends:
+        return None
+    return max(starts, default=None), min(ends, default=None)
+
+def describe_date_range(start=None, end=None):
+    return f"from {start.isoformat() if start else 'the start'} to {end.isoformat() if end else 'the end'}"
+
+def row_key(tx):
+    return tx['date'], tx['description'], tx['amount']
+
+class LiveLedger:
+    """
+    Deduplicated, date-sorted ledger kept in memory with its dedup index and running totals.
+
+    refresh() stats the statement sources and re-reads only those whose files changed,
+    through the ingestion cache. When the changed sources only gained rows dated after
+    the whole ledger, the new rows go through the dedup index in merge order, are
+    appended to the ledger and fed to the totals. Anything else (a file removed, rows
+    edited, dropped or backdated) rebuilds the state from the cache, which re-parses
+    only the changed files. Either way the ledger matches a cold load of the folder.
+    """
+
+    def __init__(self, folder_path, window_days=0, use_cache=True):
+        self.folder_path = folder_path
+        self.window_days = window_days
+        self.use_cache = use_cache
+        self.signatures = {}
+        self.row_counts = {}
+        self._reset()
+
+    def _reset(self):
+        self.transactions = []
+        self.index = DateIndex(self.transactions)
+        self.dedup = DedupIndex(self.window_days)
+        self.category_totals = CategoryTotals()
+        self.weekly_totals = WeeklyTotals()
+        self.monthly_totals = MonthlyTotals()
+        self.total_expenses = 0
+
+    def _add(self, tx):
+        """
+        Append tx, which sorts after every kept row, unless it duplicates a kept row.
+        """
+        if self.dedup.is_duplicate(tx):
+            return False
+        self.index.append(tx)
+        self.category_totals.add(tx)
+        self.weekly_totals.add(tx)
+        self.monthly_totals.add(tx)
+        if tx['amount'] < 0 and tx['category'] != "Transfers":
+            self.total_expenses += abs(tx['amount'])
+        return True
+
+    @staticmethod
+    def _source_key(file_path):
+        return PLAID_SOURCE if isinstance(file_path, tuple) else file_path
+
+    @staticmethod
+    def _signature(file_path):
+        signature = []
+        for path in source_paths(file_path):
+            stat = os.stat(path)
+            signature.append((path, stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
+
+    def _read(self, cache, file_path, loader):
+        rows = cache.get(file_path) if cache else None
+        if rows is None:
+            rows = parse_statement((file_path, loader))
+            if cache:
+                rows = cache.put(file_path, rows)
+        return rows
+
+    def _new_rows(self, runs, counts):
+        """
+        Return the rows the changed sources gained, in the order a cold k-way merge
+        yields them, or None if they do not all sort after the ledger.
+        """
+        new_runs = []
+        for key, rows in runs.items():
+            # Only rows beyond those already counted for the source are new
+            remaining = counts[key] - self.row_counts.get(key, Counter())
+            new_run = []
+            for tx in rows:
+                if remaining[row_key(tx)] > 0:
+                    remaining[row_key(tx)] -= 1
+                    new_run.append(tx)
+            new_runs.append(new_run)
+        new_rows = list(heapq.merge(*new_runs, key=transaction_sort_key))
+        if new_rows and self.index.days and transaction_day(new_rows[0]) <= self.index.days[-1]:
+            return None
+        return new_rows
+
+    def refresh(self):
+        """
+        Apply statement changes since the last refresh.
+        Returns (what happened, rows added, duplicates skipped, changed sources), or None if nothing changed.
+        """
+        sources = {self._source_key(file_path): (file_path, loader) for file_path, loader in list_statement_files(self.folder_path)}
+        signatures = {key: self._signature(file_path) for key, (file_path, _) in sources.items()}
+        changed = [key for key in sources if self.signatures.get(key) != signatures[key]]
+        removed = self.signatures.keys() - sources.keys()
+        if not changed and not removed:
+            return None
+
+        cache = IngestionCache(self.folder_path) if self.use_cache else None
+        runs = {key: self._read(cache, *sources[key]) for key in changed}
+        counts = {key: Counter(map(row_key, rows)) for key, rows in runs.items()}
+        grown = bool(self.signatures) and not removed and not any(
+            self.row_counts.get(key, Counter()) - counts[key] for key in changed
         )
-        if key not in seen:
-            seen.add(key)
-            deduped.append(tx)
+        new_rows = self._new_rows(runs, counts) if grown else None
+        grown = new_rows is not None
+        skipped = self.dedup.skipped
+        added = 0
+
+        if grown:
+            for tx in new_rows:
+                added += self._add(tx)
+            action = "updated"
         else:
-            print(f"🟡 Skipped duplicate: {tx['date']} | {tx['description']} | ${tx['amount']:.2f}")
-    return deduped
+            # Merge every source in list_statement_files order, as a cold load does
+            runs = {key: runs[key] if key in runs else self._read(cache, *sources[key]) for key in sources}
+            counts = {key: counts[key] if key in counts else Counter(map(row_key, runs[key])) for key in sources}
+            self._reset()
+            for tx in heapq.merge(*runs.values(), key=transaction_sort_key):
+                added += self._add(tx)
+            action = "rebuilt" if self.signatures else "loaded"
 
-def clean_transactions_for_json(transactions):
+        if cache:
+            # Record every current source so the manifest keeps the unchanged ones
+            for file_path, _ in sources.values():
+                cache.run_file(file_path)
+            cache.save()
+        self.signatures = signatures
+        self.row_counts = {key: counts.get(key, self.row_counts.get(key)) for key in sources}
+        return action, added, self.dedup.skipped - skipped if grown else self.dedup.skipped, sorted(set(changed) | removed)
+
+    def report(self, category=None, weekly=False, monthly=False, date_range=None):
+        """
+        Print the CLI report from the warm state, or from a date-range slice of it.
+        """
+        if date_range:
+            run_report(self.index.slice(*date_range), category, weekly, monthly, all_weeks=True)
+            return
+        print_transactions(self.transactions)
+        print(f"\nTOTAL EXPENSES: ${format_cents(self.total_expenses)}")
+        if category:
+            print_category_transactions(self.transactions, category)
+        print_transfers(self.transactions)
+        if weekly:
+            self.weekly_totals.print_summary()
+        if monthly:
+            print("\n" + "=" * 7 + " MONTHLY SUMMARY " + "=" * 7 + "\n")
+            self.monthly_totals.print_summary()
+
+def read_commands(commands):
     """
-    Convert DateObj datetime to string for JSON serialization.
+    Feed lines typed on stdin into the commands queue until stdin closes.
     """
-    cleaned = []
-    for tx in transactions:
-        tx_copy = tx.copy()
-        if 'DateObj' in tx_copy:
-            if isinstance(tx_copy['DateObj'], datetime):
-                tx_copy['DateObj'] = tx_copy['DateObj'].strftime('%m/%d/%Y')
-            else:
-                del tx_copy['DateObj']
-        cleaned.append(tx_copy)
-    return cleaned
+    for line in sys.stdin:
+        commands.put(line.strip().lower())
+
+def watch_statements(folder_path, interval=WATCH_INTERVAL, window_days=0, use_cache=True,
+                     category=None, weekly=False, monthly=False, date_range=None):
+    """
+    Keep a LiveLedger of folder_path warm, polling for new or changed statements every
+    interval seconds and serving reports typed on stdin from memory until quit or Ctrl-C.
+    """
+    live = LiveLedger(folder_path, window_days, use_cache)
+    commands = queue.Queue()
+    threading.Thread(target=read_commands, args=(commands,), daemon=True).start()
+    print(f"👀 Watching {folder_path}/ every {interval:g}s. Press Enter for a report, or type weekly, monthly, totals or quit.")
+    command = None
+    try:
+        while True:
+            start = time.perf_counter()
+            change = live.refresh()
+            if change:
+                action, added, skipped, changed = change
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"🔄 {action.capitalize()} {len(live.transactions)} transactions after changes to {', '.join(changed)}"
+                      f" (+{added}, {skipped} duplicates skipped) in {elapsed:.1f} ms")
+                logging.info(f"Watch {action}: +{added} transactions, {skipped} duplicates skipped, sources {changed}")
+
+            if command in ("", "report"):
+                live.report(category=category, weekly=weekly, monthly=monthly, date_range=date_range)
+            elif command == "weekly":
+                live.weekly_totals.print_summary()
+            elif command == "monthly":
+                live.monthly_totals.print_summary()
+            elif command == "totals":
+                print(f"\nTOTAL EXPENSES: ${format_cents(live.total_expenses)}")
+                print_income_expense_summary(live.category_totals.sums)
+            elif command in ("q", "quit", "exit"):
+                break
+            elif command is not None:
+                print("Commands: Enter or report, weekly, monthly, totals, quit")
+
+            try:
+                command = commands.get(timeout=interval)
+            except queue.Empty:
+                command = None
+    except KeyboardInterrupt:
+        pass
+    print("👋 Stopped watching.")
+
+def open_transaction_store(path=DEFAULT_STORE_PATH):
+    """
+    Open the SQLite transaction store, indexing descriptions the same way deduplication normalizes them.
+    """
+    return TransactionStore(path, normalize=normalize_description_cached, rule_matcher=rule_keyword_matcher)
+
+def statements_fingerprint(folder_path, window_days=0, rules=None):
+    """
+    Hash the statement files' paths, sizes and mtimes with the rules (rules_table text,
+    the current rules by default) and dedup settings.
+    """
+    digest = hashlib.sha256(json.dumps([LEDGER_CACHE_VERSION, rules_fingerprint(rules), window_days]).encode("utf-8"))
+    file_paths = [path for source, _ in list_statement_files(folder_path) for path in source_paths(source)]
+    for file_path in sorted(file_paths):
+        stat = os.stat(file_path)
+        digest.update(f"{os.path.abspath(file_path)}\0{stat.st_size}\0{stat.st_mtime}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def sync_transaction_store(store, folder_path, use_cache=True, workers=1, window_days=0):
+    """
+    Reload the store's statement rows from folder_path if any statement, rule or dedup
+    setting changed since the last sync. Returns True if the store was reloaded.
+    """
+    fingerprint = statements_fingerprint(folder_path, window_days)
+    if store.get_meta(f"fingerprint:{STATEMENTS_SOURCE}") == fingerprint:
+        print(f"Transaction store is up to date ({store.count()} transactions in {store.path}).")
+        return False
+    if not recategorize_transaction_store(store, folder_path, window_days, fingerprint):
+        transactions = iter_deduplicated(
+            iter_all_transactions_from_folder(folder_path, use_cache=use_cache, workers=workers),
+            window_days=window_days
+        )
+        added, removed = store.replace_source(transactions, STATEMENTS_SOURCE, fingerprint, rules_table())
+        print(f"Stored {store.count()} transactions in {store.path} ({added} added, {removed} removed).")
+    print_budget_alerts(store)
+    return True
+
+def recategorize_transaction_store(store, folder_path, window_days, fingerprint):
+    """
+    Apply keyword rule edits to the store's statement rows in place, re-evaluating only
+    the rows diff_rules says can change.
+
+    This needs the rules the rows were stored with, and the statements and dedup
+    settings must be unchanged; other rule settings change which rows are kept. Returns
+    False, leaving the store untouched, when a full reload is needed instead.
+    """
+    stored_rules = store.get_meta(f"rules:{STATEMENTS_SOURCE}")
+    if stored_rules is None:
+        return False
+    rules = rules_table()
+    old_version, _, _, old_excluded, _ = json.loads(stored_rules)
+    if (old_version, old_excluded) != (LEDGER_CACHE_VERSION, EXCLUDE_DESCRIPTIONS):
+        return False
+    if statements_fingerprint(folder_path, window_days, stored_rules) != store.get_meta(f"fingerprint:{STATEMENTS_SOURCE}"):
+        return False
+
+    matcher = get_category_matcher()
+    stale, added = diff_rules(rules_matcher(stored_rules), matcher)
+    evaluated, changed = store.recategorize(stale, added, matcher.classify, STATEMENTS_SOURCE, fingerprint, rules)
+    logging.info(f"Rules changed: {len(stale)} stale and {len(added)} added keywords, "
+                 f"{evaluated} transactions re-evaluated, {changed} recategorized")
+    print(f"Categorization rules changed: re-evaluated {evaluated} of {store.count()} transactions, "
+          f"{changed} recategorized.")
+    return True
+
+def print_budget_alerts(store):
+    """
+    Print and log the budget alerts the store raised since they were last printed.
+    When one batch crosses several thresholds of a budget, only the highest is shown.
+    """
+    latest = {(alert['period'], alert['period_key'], alert['category']): alert for alert in store.take_alerts()}
+    for alert in latest.values():
+        budget = f"${format_cents(alert['budget'])} {alert['period']}ly budget for {alert['period_key']}"
+        if alert['threshold'] >= 100:
+            message = f"🚨 {alert['category']} is over its {budget}: ${format_cents(alert['spent'])} spent."
+        else:
+            message = (f"⚠️  {alert['category']} has used {alert['threshold']}% of its {budget}: "
+                       f"${format_cents(alert['spent'])} spent.")
+        print(message)
+        logging.warning(message)
 
-def save_transactions_to_json(transactions):
+def print_budget_status(store):
     """
-    Save transactions to a JSON file with today's date in filename.
+    Print each budget's spending so far in the current week or month.
+    """
+    print("\n======= BUDGETS =======")
+    status = store.budget_status()
+    if not status:
+        print("No budgets set. Add one with --budget CATEGORY week|month AMOUNT.")
+    for category, period, label, spent, budget in status:
+        left = f"${format_cents(budget - spent)} left" if spent <= budget else f"over by ${format_cents(spent - budget)}"
+        print(f"{category} ({label}): ${format_cents(spent)} of ${format_cents(budget)} ({spent * 100 // budget}%), {left}")
+
+def print_search_results(store, query, date_range=None):
+    """
+    Print the stored transactions matching a --search query and their net total.
+    """
+    start, end = date_range or (None, None)
+    matches = list(store.search(query, start.toordinal() if start else None, end.toordinal() if end else None))
+    print(f"\n--- Search: {query} ({len(matches)} matches) ---")
+    print_transactions(matches)
+    print(f"TOTAL: ${format_cents(sum(tx['amount'] for tx in matches))}")
+
+def recent_weeks(today=None):
+    """
+    Return the ISO (year, week) of the previous and the current week.
+    """
+    today = today or date.today()
+    return [tuple((today - timedelta(weeks=1)).isocalendar()[:2]), tuple(today.isocalendar()[:2])]
+
+def print_period_totals(periods, period):
+    """
+    Print [(period, {category: total})] from TransactionStore.last_periods, oldest first.
+    """
+    for key, cat_totals in periods:
+        if period == "day":
+            print(f"\n=== {date.fromordinal(key).strftime('%a %m/%d/%Y')} ===")
+        elif period == "week":
+            print(f"\n=== Week {key[1]} of {key[0]} ===")
+        else:
+            print(f"\n=== {datetime.strptime(key, '%Y-%m').strftime('%B %Y')} ===")
+        for category, total in sorted(cat_totals.items(), key=lambda x: abs(x[1]), reverse=True):
+            print(f"{category}: ${format_cents(total)}")
+        print("------------------------")
+        print(f"TOTAL: ${format_cents(sum(cat_totals.values()))}")
+
+def run_store_report(store, category=None, weekly=False, monthly=False):
+    """
+    Produce the CLI report from indexed queries against the transaction store.
+    """
+    print_transactions(store.iter_transactions())
+    print(f"\nTOTAL EXPENSES: ${format_cents(store.total_expenses())}")
+    if category:
+        print_category_transactions(store.category_transactions(category), category)
+    print_transfers(store.category_transactions("Transfers"))
+
+    if weekly:
+        print_weekly_totals(store.weekly_totals(recent_weeks()))
+    if monthly:
+        print("\n" + "=" * 7 + " MONTHLY SUMMARY " + "=" * 7 + "\n")
+        print_monthly_totals(store.monthly_totals())
+
+def run_report(transactions, category=None, weekly=False, monthly=False, all_weeks=False):
+    """
+    Print the CLI report over an in-memory list of transactions, such as a date-range slice.
+    """
+    # Only the period summaries gain from a columnar copy
+    summary_source = (as_columnar(transactions) if weekly or monthly else None) or transactions
+    print_transactions(transactions)
+    print_total_expenses(summary_source)
+    if category:
+        print_category_transactions(transactions, category)
+    print_transfers(transactions)
+    if weekly:
+        print_weekly_summary(summary_source, all_weeks)
+    if monthly:
+        print("\n" + "=" * 7 + " MONTHLY SUMMARY " + "=" * 7 + "\n")
+        print_monthly_summary(summary_source)
+
+def write_transactions_json(transactions, filename):
+    """
+    Write transactions to filename as an indented JSON array, one record at a time.
+    Returns the number of records written.
     """
-    cleaned_transactions = clean_transactions_for_json(transactions)
-    filename = f"statements/transactions_{datetime.now().strftime('%m%d%Y')}.json"
     with open(filename, "w", encoding="utf-8") as f:
-        json.dump(cleaned_transactions, f, indent=2)
-    print(f"Saved transactions to {filename}")
+        return write_json(f, transactions)
+
+def daily_export_filename(fmt="json"):
+    """
+    Return the export path for today's date in the given format.
+    """
+    return f"statements/{EXPORT_PREFIX}{datetime.now().strftime('%m%d%Y')}.{fmt}"
+
+def report_export(path, written):
+    if written:
+        print(f"Saved transactions to {path}")
+    else:
+        print(f"Transactions unchanged since the last export: {path}")
+
+def save_transactions(transactions, fmt="json"):
+    """
+    Export transactions to a file with today's date in its name, skipping the write when nothing changed.
+    Returns the number of transactions exported.
+    """
+    path, count, written = export_transactions(transactions, daily_export_filename(fmt), fmt)
+    report_export(path, written)
+    return count
+
+def run_streaming_report(transactions, category=None, weekly=False, monthly=False, json_only=False, fmt="json",
+                         date_range=None):
+    """
+    Produce the CLI report in a single pass over a transaction stream and return the row count.
+
+    Rows are printed and written to the export as they arrive, while running
+    aggregators collect the expense, weekly and monthly totals, so memory stays flat
+    no matter how long the ledger is. With date_range only the rows in that range are
+    reported; the export still receives every row.
+    """
+    total_expenses = 0
+    category_txs = []
+    transfers = []
+    weekly_totals = WeeklyTotals()
+    monthly_totals = MonthlyTotals()
+
+    def report_pass():
+        nonlocal total_expenses
+        for tx in transactions:
+            if not json_only and (not date_range or in_date_range(tx, *date_range)):
+                print_transactions([tx])
+                if tx['amount'] < 0 and tx['category'] != "Transfers":
+                    total_expenses += abs(tx['amount'])
+                if category and tx['category'] == category:
+                    category_txs.append(tx)
+                if tx['category'] == "Transfers":
+                    transfers.append(tx)
+                weekly_totals.add(tx)
+                monthly_totals.add(tx)
+            yield tx
+
+    path, count, written = export_transactions(report_pass(), daily_export_filename(fmt), fmt)
+    print(f"Streamed {count} transactions after removing duplicates.")
+
+    if not json_only:
+        print(f"\nTOTAL EXPENSES: ${format_cents(total_expenses)}")
+        if category:
+            print_category_transactions(category_txs, category)
+        print_transfers(transfers)
+    report_export(path, written)
+
+    if not json_only:
+        if weekly:
+            weekly_totals.print_summary(all_weeks=bool(date_range))
+        if monthly:
+            print("\n" + "=" * 7 + " MONTHLY SUMMARY " + "=" * 7 + "\n")
+            monthly_totals.print_summary()
+    return count
+
+def write_profile_report(profiler, ledger=None, cprofiler=None, **extra):
+    """
+    Emit the --profile report: per-stage timings plus cache and rule-hit statistics.
+    The JSON goes to stderr and to logs/profile_<timestamp>.json, next to the
+    cProfile dump when there is one.
+    """
+    base = os.path.join("logs", f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    caches = {
+        "categorize": categorization_cache_info(),
+        "statement_date": parse_statement_date.cache_info(),
+        "plaid_date": parse_plaid_date.cache_info(),
+        "amount": parse_amount_cents.cache_info(),
+        "normalize_description": normalize_description_cached.cache_info(),
+    }
+    report = profiler.report(caches={name: info._asdict() for name, info in caches.items()}, **extra)
+    if ledger is not None:
+        report["rule_hits"] = rule_hit_stats(ledger)
+    if cprofiler is not None:
+        report["cprofile"] = f"{base}.prof"
+        cprofiler.dump_stats(report["cprofile"])
+    if profiler.trace_memory:
+        report["top_allocations"] = [
+            {"location": str(stat.traceback), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+            for stat in tracemalloc.take_snapshot().statistics("lineno")[:10]
+        ]
+
+    write_json_atomic(f"{base}.json", report, indent=2)
+    print("\n" + "=" * 7 + " PROFILE " + "=" * 7)
+    profiler.print_summary()
+    print(f"📊 Profile report saved to {base}.json")
+    print(json.dumps(report), file=sys.stderr)
+    logging.info(f"Profile report written to {base}.json")
+    return report
+
+def prompt_cash_transaction():
+    """
+    Prompt for a manual cash transaction and return it.
+    """
+    desc = input("Enter description: ").strip()
+    amount_input = input("Enter amount (positive = income, negative = expense): ").strip()
+    try:
+        amount = dollars_to_cents(amount_input)
+    except ValueError:
+        print("❌ Invalid amount.")
+        exit(1)
+    category = input("Enter category (default: 'Cash Income'): ").strip() or "Cash Income"
+
+    tx = {
+        'date': datetime.now().strftime('%m/%d/%Y'),
+        'DateObj': datetime.now(),
+        'description': desc,
+        'amount': amount,
+        'category': category
+    }
+    print(f"✅ Added: {tx['date']} | {tx['description']} | ${format_cents(tx['amount'])} | {tx['category']}")
+    return tx
 
 if __name__ == "__main__":
     import argparse
@@ -395,51 +1838,203 @@ if __name__ == "__main__":
     parser.add_argument("--category", help="Print transactions for a specific category (e.g. 'Groceries/Home')")
     parser.add_argument("--weekly", action="store_true", help="Show weekly summary")
     parser.add_argument("--monthly", action="store_true", help="Show monthly summary")
-    parser.add_argument("--json-only", action="store_true", help="Only save transactions to JSON, no printout")
+    parser.add_argument("--json-only", action="store_true", help="Only save the transaction export, no printout")
+    parser.add_argument("--save", choices=EXPORT_FORMATS, default="json",
+                        help="Export format: indented JSON array, compact NDJSON or CSV (default: json)")
     parser.add_argument("--add-cash", action="store_true", help="Add a manual cash transaction")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse every statement instead of using the ingestion cache")
+    parser.add_argument("--stream", action="store_true", help="Stream the ledger through a single pass instead of loading it into memory")
+    parser.add_argument("--search", metavar="QUERY",
+                        help="Find stored transactions whose description has words starting with every term (implies --db)")
+    parser.add_argument("--month", help="Report only this month, e.g. July, 'July 2025' or 2025-07 (most recent if no year)")
+    parser.add_argument("--from", dest="from_date", metavar="DATE", help="Report only transactions on or after DATE (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="to_date", metavar="DATE", help="Report only transactions on or before DATE (YYYY-MM-DD)")
+    parser.add_argument("--weeks", type=positive_int, metavar="N", help="Report only the last N weeks, including the current one")
+    parser.add_argument("--watch", nargs="?", type=positive_float, const=WATCH_INTERVAL, default=None, metavar="SECONDS",
+                        help=f"Keep the ledger in memory and apply new statements as they land (poll interval, default {WATCH_INTERVAL:g}s)")
+    parser.add_argument("--workers", type=int, default=1, help="Parse statement files across N processes")
+    parser.add_argument("--dedup-window", type=non_negative_int, default=0,
+                        help="Also treat same-amount, same-description rows up to N days apart as duplicates")
+    parser.add_argument("--db", nargs="?", const=DEFAULT_STORE_PATH, default=None,
+                        help=f"Report from the SQLite transaction store (default path: {DEFAULT_STORE_PATH})")
+    parser.add_argument("--budget", nargs=3, action="append", default=[], metavar=("CATEGORY", "PERIOD", "AMOUNT"),
+                        help="Set a week or month spending budget for a category, 0 to remove it (implies --db)")
+    parser.add_argument("--alerts", action="store_true",
+                        help="Show spending against each budget this week and month (implies --db)")
+    parser.add_argument("--last", type=positive_int, metavar="N", help="Show totals for the last N periods from the store's rollups")
+    parser.add_argument("--period", choices=["day", "week", "month"], default="week", help="Period for --last (default: week)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Report per-stage timings, memory, cache and rule-hit statistics (saved under logs/)")
+    parser.add_argument("--cprofile", action="store_true", help="With --profile, also save a cProfile dump under logs/")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="With --profile, also trace per-stage Python allocations and the top allocation sites")
     args = parser.parse_args()
-
-    folder = "statements"
-    transactions = load_all_transactions_from_folder(folder)
-    print(f"Loaded {len(transactions)} total transactions.")
-    transactions = deduplicate_transactions(transactions)
-    print(f"{len(transactions)} transactions after removing duplicates.")
-
-    # ➕ Handle manual cash entry
-    if args.add_cash:
-        desc = input("Enter description: ").strip()
-        amount_input = input("Enter amount (positive = income, negative = expense): ").strip()
+    args.profile = args.profile or args.cprofile or args.tracemalloc
+    if (args.last or args.search or args.budget or args.alerts) and not args.db:
+        args.db = DEFAULT_STORE_PATH
+    budgets = []
+    for category, period, amount in args.budget:
+        if period not in BUDGET_PERIODS:
+            parser.error(f"budget period must be one of {', '.join(BUDGET_PERIODS)}, not {period!r}")
         try:
-            amount = float(amount_input)
+            budgets.append((category, period, dollars_to_cents(amount.translate(AMOUNT_SYMBOLS))))
         except ValueError:
-            print("❌ Invalid amount.")
-            exit(1)
-        category = input("Enter category (default: 'Cash Income'): ").strip() or "Cash Income"
-        
-        tx = {
-            'date': datetime.now().strftime('%m/%d/%Y'),
-            'DateObj': datetime.now(),
-            'description': desc,
-            'amount': amount,
-            'category': category
-        }
-        transactions.append(tx)
-        print(f"✅ Added: {tx['date']} | {tx['description']} | ${tx['amount']:.2f} | {tx['category']}")
+            parser.error(f"invalid budget amount: {amount!r}")
+    try:
+        date_range = resolve_date_range(
+            args.month,
+            parse_date_arg(args.from_date) if args.from_date else None,
+            parse_date_arg(args.to_date) if args.to_date else None,
+            args.weeks
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Configure logging
+    os.makedirs("logs", exist_ok=True)
+    logging.basicConfig(
+        filename="logs/parser.log",
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s: %(message)s"
+    )
+
+    folder = "statements"
+    profiler = StageProfiler(trace_memory=args.tracemalloc)
+    cprofiler = None
+    if args.cprofile:
+        import cProfile
+
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
+    ledger = None
+
+    if args.watch is not None:
+        watch_statements(
+            folder, args.watch, window_days=args.dedup_window, use_cache=not args.no_cache,
+            category=args.category, weekly=args.weekly, monthly=args.monthly, date_range=date_range
+        )
+
+    elif args.db:
+        with profiler.stage("sync_store") as record:
+            store = open_transaction_store(args.db)
+            sync_transaction_store(
+                store, folder, use_cache=not args.no_cache, workers=args.workers, window_days=args.dedup_window
+            )
+            record["rows"] = store.count()
+        if args.add_cash:
+            store.insert([prompt_cash_transaction()], source=MANUAL_SOURCE)
+        for category, period, amount in budgets:
+            store.set_budget(category, period, amount)
+            print(f"✅ {category} budget: ${format_cents(amount)} per {period}." if amount > 0
+                  else f"✅ Removed the {category} {period}ly budget.")
+        print_budget_alerts(store)
+        with profiler.stage("report", store.count()):
+            if args.json_only:
+                save_transactions(store.iter_transactions(), args.save)
+            elif args.alerts:
+                print_budget_status(store)
+            elif args.search:
+                print_search_results(store, args.search, date_range)
+            elif date_range:
+                start, end = date_range
+                transactions = list(store.date_range_transactions(
+                    start.toordinal() if start else NO_DAY + 1, (end or date.max).toordinal()
+                ))
+                print(f"{len(transactions)} transactions {describe_date_range(start, end)}.")
+                run_report(transactions, category=args.category, weekly=args.weekly, monthly=args.monthly, all_weeks=True)
+                print("\n❤️  Script by JL for Rachel ❤️")
+            else:
+                run_store_report(store, category=args.category, weekly=args.weekly, monthly=args.monthly)
+                if args.last:
+                    print(f"\n======= LAST {args.last} {args.period.upper()}S =======")
+                    print_period_totals(store.last_periods(args.period, args.last), args.period)
+                print("\n❤️  Script by JL for Rachel ❤️")
+        if args.profile:
+            ledger = list(store.iter_transactions())
+        store.close()
+
+    elif args.stream:
+        cash_txs = [prompt_cash_transaction()] if args.add_cash else []
+        with profiler.stage("stream") as record:
+            stream = iter_deduplicated(
+                iter_all_transactions_from_folder(folder, use_cache=not args.no_cache, workers=args.workers),
+                window_days=args.dedup_window
+            )
+            record["rows"] = run_streaming_report(
+                itertools.chain(stream, cash_txs),
+                category=args.category,
+                weekly=args.weekly,
+                monthly=args.monthly,
+                json_only=args.json_only,
+                fmt=args.save,
+                date_range=date_range
+            )
+        if not args.json_only:
+            print("\n❤️  Script by JL for Rachel ❤️")
 
-    if args.json_only:
-        save_transactions_to_json(transactions)
     else:
-        print_transactions(transactions)
-        print_total_expenses(transactions)
-        if args.category:
-            print_category_transactions(transactions, args.category)
-        print_transfers(transactions)
-        save_transactions_to_json(transactions)
-
-        if args.weekly:
-            print_weekly_summary(transactions)
-        if args.monthly:
-            print("\n" + "=" * 7 + " MONTHLY SUMMARY " + "=" * 7 + "\n") 
-            print_monthly_summary(transactions)
-
-        print("\n❤️  Script by JL for Rachel ❤️")
+        with profiler.stage("load") as record:
+            transactions = load_all_transactions_from_folder(folder, use_cache=not args.no_cache, workers=args.workers)
+            record["rows"] = len(transactions)
+        print(f"Loaded {len(transactions)} total transactions.")
+        with profiler.stage("deduplicate", len(transactions)):
+            transactions = deduplicate_transactions(transactions, window_days=args.dedup_window)
+        print(f"{len(transactions)} transactions after removing duplicates.")
+
+        index = DateIndex(transactions) if date_range else None
+
+        # ➕ Handle manual cash entry
+        if args.add_cash:
+            cash_tx = prompt_cash_transaction()
+            if index:
+                index.insert(cash_tx)
+            else:
+                transactions.append(cash_tx)
+
+        # Date filters narrow the report; the export always holds the whole ledger
+        report_txs = transactions
+        if index:
+            with profiler.stage("date_slice", len(transactions)) as record:
+                report_txs = index.slice(*date_range)
+                record["rows"] = len(report_txs)
+            print(f"{len(report_txs)} transactions {describe_date_range(*date_range)}.")
+
+        if args.json_only:
+            with profiler.stage("export", len(transactions)):
+                save_transactions(transactions, args.save)
+        else:
+            # Period summaries share one columnar copy of a large ledger when numpy is available
+            summary_source = report_txs
+            if args.weekly or args.monthly:
+                with profiler.stage("columnar", len(report_txs)):
+                    summary_source = as_columnar(report_txs) or report_txs
+
+            with profiler.stage("print_transactions", len(report_txs)):
+                print_transactions(report_txs)
+            with profiler.stage("summaries", len(report_txs)):
+                print_total_expenses(summary_source)
+                if args.category:
+                    print_category_transactions(report_txs, args.category)
+                print_transfers(report_txs)
+            with profiler.stage("export", len(transactions)):
+                save_transactions(transactions, args.save)
+
+            if args.weekly:
+                with profiler.stage("weekly_summary", len(report_txs)):
+                    print_weekly_summary(summary_source, all_weeks=bool(date_range))
+            if args.monthly:
+                with profiler.stage("monthly_summary", len(report_txs)):
+                    print("\n" + "=" * 7 + " MONTHLY SUMMARY " + "=" * 7 + "\n")
+                    print_monthly_summary(summary_source)
+
+            print("\n❤️  Script by JL for Rachel ❤️")
+        ledger = transactions
+
+    if cprofiler:
+        cprofiler.disable()
+    if args.profile:
+        write_profile_report(
+            profiler, ledger, cprofiler,
+            mode="watch" if args.watch is not None else "db" if args.db else "stream" if args.stream else "memory",
+            workers=args.workers, numpy=NUMPY_AVAILABLE
+        )
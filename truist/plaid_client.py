@@ -0,0 +1,59 @@
+import os
+import threading
+
+PLAID_ENV_HOSTS = {
+    "sandbox": "https://sandbox.plaid.com",
+    "development": "https://development.plaid.com",
+    "production": "https://production.plaid.com"
+}
+# One urllib3 connection per concurrent fetch thread in plaid_fetch
+CONNECTION_POOL_SIZE = 8
+
+_client = None
+_client_lock = threading.Lock()
+
+def plaid_credentials():
+    """
+    Load .env and return (client_id, secret, env), raising if any is missing or env is unknown.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    client_id = os.getenv("PLAID_CLIENT_ID")
+    secret = os.getenv("PLAID_SECRET")
+    env = os.getenv("PLAID_ENV")
+    if not all([client_id, secret, env]):
+        raise EnvironmentError("❌ One or more Plaid environment variables are missing.")
+    if env not in PLAID_ENV_HOSTS:
+        raise ValueError(f"Invalid PLAID_ENV value: {env}")
+    return client_id, secret, env
+
+def build_plaid_client():
+    """
+    Build a PlaidApi client from the environment. The SDK is imported here, not at module import.
+    """
+    from plaid.api import plaid_api
+    from plaid.api_client import ApiClient
+    from plaid.configuration import Configuration
+
+    client_id, secret, env = plaid_credentials()
+    configuration = Configuration(
+        # PLAID_HOST points the client at another server, e.g. a local stub for testing
+        host=os.getenv("PLAID_HOST") or PLAID_ENV_HOSTS[env],
+        api_key={
+            'clientId': client_id,
+            'secret': secret,
+        }
+    )
+    configuration.connection_pool_maxsize = CONNECTION_POOL_SIZE
+    return plaid_api.PlaidApi(ApiClient(configuration))
+
+def get_plaid_client():
+    """
+    Return the process-wide Plaid client, building it on first use.
+    Every caller and thread shares one client and its connection pool.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = build_plaid_client()
+    return _client
@@ -1,68 +1,58 @@
 import time
 import json
 import os
+import hashlib
+import random
 import logging
+import argparse
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from plaid.exceptions import ApiException
 
-from plaid.api import plaid_api
-from plaid.configuration import Configuration
-from plaid.api_client import ApiClient
-
-from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
-from plaid.model.transactions_get_request import TransactionsGetRequest
-
-# Import Plaid Link token creation models
-from plaid.model.link_token_create_request import LinkTokenCreateRequest
-from plaid.model.country_code import CountryCode
-from plaid.model.link_token_create_request_user import LinkTokenCreateRequestUser
-from plaid.model.products import Products
-
-from dotenv import load_dotenv
-load_dotenv()
-
-PLAID_CLIENT_ID = os.getenv("PLAID_CLIENT_ID")
-PLAID_SECRET = os.getenv("PLAID_SECRET")
-PLAID_ENV = os.getenv("PLAID_ENV")
-
-if not all([PLAID_CLIENT_ID, PLAID_SECRET, PLAID_ENV]):
-    raise EnvironmentError("❌ One or more Plaid environment variables are missing.")
-
-print(f"✅ PLAID_CLIENT_ID loaded: {bool(PLAID_CLIENT_ID)}")
-print(f"✅ PLAID_SECRET loaded: {bool(PLAID_SECRET)}")
-print(f"✅ PLAID_ENV loaded: {PLAID_ENV}")
-
-
-# Configure logging
-os.makedirs("logs", exist_ok=True)
-logging.basicConfig(
-    filename="logs/plaid_fetch.log",
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s: %(message)s"
+from exchange_token import load_token_from_file
+from plaid_client import CONNECTION_POOL_SIZE, get_plaid_client, plaid_credentials
+from parser import (
+    open_transaction_store, sync_transaction_store, write_json_atomic, iter_plaid_records, write_plaid_records,
+    plaid_tombstone
 )
 
-PLAID_ENV_HOSTS = {
-    "sandbox": "https://sandbox.plaid.com",
-    "development": "https://development.plaid.com",
-    "production": "https://production.plaid.com"
-}
-
-if PLAID_ENV not in PLAID_ENV_HOSTS:
-    raise ValueError(f"Invalid PLAID_ENV value: {PLAID_ENV}")
-
-configuration = Configuration(
-    host=PLAID_ENV_HOSTS[PLAID_ENV],
-    api_key={
-        'clientId': PLAID_CLIENT_ID,
-        'secret': PLAID_SECRET,
-    }
-)
+# The Plaid SDK and its models are imported inside the functions that call the API, so
+# importing this module stays cheap and needs no credentials until a request is made.
 
+SYNC_STATE_DIR = ".plaid_sync"
+SYNC_PAGE_SIZE = 500
+FETCH_WORKERS = CONNECTION_POOL_SIZE
+PAGE_SIZE = 500
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+RETRYABLE_ERRORS = {"PRODUCT_NOT_READY", "RATE_LIMIT_EXCEEDED", "TRANSACTIONS_LIMIT", "INTERNAL_SERVER_ERROR"}
+PER_INSTITUTION_LIMIT = 2
+
+def configure_logging():
+    os.makedirs("logs", exist_ok=True)
+    logging.basicConfig(
+        filename="logs/plaid_fetch.log",
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s: %(message)s"
+    )
 
-api_client = ApiClient(configuration)
-client = plaid_api.PlaidApi(api_client)
+def print_environment():
+    """
+    Check the Plaid credentials and print which were loaded.
+    """
+    client_id, secret, env = plaid_credentials()
+    print(f"✅ PLAID_CLIENT_ID loaded: {bool(client_id)}")
+    print(f"✅ PLAID_SECRET loaded: {bool(secret)}")
+    print(f"✅ PLAID_ENV loaded: {env}")
 
 def create_link_token():
+    from plaid.model.country_code import CountryCode
+    from plaid.model.link_token_create_request import LinkTokenCreateRequest
+    from plaid.model.link_token_create_request_user import LinkTokenCreateRequestUser
+    from plaid.model.products import Products
+
     request = LinkTokenCreateRequest(
         products=[Products("transactions")],
         client_name="Your App Name",
@@ -70,10 +60,234 @@ def create_link_token():
         language="en",
         user=LinkTokenCreateRequestUser(client_user_id="unique_user_id_123")  # Replace with your user id logic
     )
-    response = client.link_token_create(request)
+    response = get_plaid_client().link_token_create(request)
     return response['link_token']
 
-def main():
+def plaid_error_code(e):
+    """
+    Return the Plaid error_code from an ApiException's body, if there is one.
+    """
+    try:
+        return json.loads(e.body).get("error_code")
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+def call_with_backoff(func, *args, **kwargs):
+    """
+    Call a Plaid API method, retrying rate-limit, not-ready and server errors with
+    exponential backoff and full jitter. Other errors, and the last failure, are raised.
+    """
+    from plaid.exceptions import ApiException
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return func(*args, **kwargs)
+        except ApiException as e:
+            code = plaid_error_code(e)
+            retryable = code in RETRYABLE_ERRORS or e.status == 429 or (e.status or 0) >= 500
+            if not retryable or attempt == MAX_RETRIES:
+                logging.error(f"ApiException: {e}")
+                raise
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            logging.warning(f"{code or e.status}, retrying in {delay:.1f}s ({attempt + 1}/{MAX_RETRIES})...")
+            time.sleep(delay)
+
+def fetch_transactions_to_file(access_token, start_date, end_date, filename, page_size=PAGE_SIZE):
+    """
+    Page through /transactions/get with offset and count until total_transactions is
+    reached, appending each page to filename as compact newline-delimited records as it
+    arrives so only one page is held in memory. The file is written under a temporary
+    name and renamed into place when complete. Returns the number of transactions written.
+    """
+    from plaid.model.transactions_get_request import TransactionsGetRequest
+    from plaid.model.transactions_get_request_options import TransactionsGetRequestOptions
+
+    client = get_plaid_client()
+    tmp_path = f"{filename}.tmp"
+    count = 0
+    total = None
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        while total is None or count < total:
+            request = TransactionsGetRequest(
+                access_token=access_token,
+                start_date=start_date,
+                end_date=end_date,
+                options=TransactionsGetRequestOptions(count=page_size, offset=count)
+            )
+            response = call_with_backoff(client.transactions_get, request, _preload_content=False)
+            page = json.loads(response.data)
+            total = page['total_transactions']
+            if not page['transactions']:
+                break
+            count += write_plaid_records(f, page['transactions'])
+            logging.info(f"Fetched {count}/{total} transactions")
+    os.replace(tmp_path, filename)
+    return count
+
+def item_key(access_token):
+    """
+    Return a stable, non-secret name for an item's sync files.
+    """
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()[:16]
+
+def load_access_token(token_path=".access_token"):
+    """
+    Return the access token saved by exchange_token.py, falling back to PLAID_ACCESS_TOKEN.
+    """
+    try:
+        return load_token_from_file(token_path)
+    except FileNotFoundError:
+        token = os.getenv("PLAID_ACCESS_TOKEN")
+        if not token:
+            raise FileNotFoundError(f"No access token in {token_path} or PLAID_ACCESS_TOKEN; run exchange_token.py first.")
+        return token
+
+def fetch_sync_deltas(access_token, cursor="", count=SYNC_PAGE_SIZE, limit=None):
+    """
+    Page through /transactions/sync from cursor.
+    Returns (added, modified, removed, next_cursor) with transactions as dicts.
+    Each request is made while holding limit, if given.
+    """
+    from plaid.exceptions import ApiException
+    from plaid.model.transactions_sync_request import TransactionsSyncRequest
+
+    client = get_plaid_client()
+    limit = limit or nullcontext()
+    while True:
+        added, modified, removed = [], [], []
+        next_cursor = cursor
+        try:
+            while True:
+                options = {"cursor": next_cursor} if next_cursor else {}
+                request = TransactionsSyncRequest(access_token=access_token, count=count, **options)
+                # Read the raw JSON: building Plaid model objects costs milliseconds per
+                # transaction and holds the GIL, which serializes concurrent fetches
+                with limit:
+                    response = call_with_backoff(client.transactions_sync, request, _preload_content=False)
+                page = json.loads(response.data)
+                added += page['added']
+                modified += page['modified']
+                removed += page['removed']
+                next_cursor = page['next_cursor']
+                if not page['has_more']:
+                    return added, modified, removed, next_cursor
+        except ApiException as e:
+            # Plaid asks clients to restart the whole pagination from the original cursor
+            if "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION" in str(e):
+                logging.warning("Transactions changed during sync pagination, restarting from the saved cursor")
+                continue
+            raise
+
+def apply_sync_deltas(transactions, added, modified, removed):
+    """
+    Apply sync deltas to a {transaction_id: transaction} ledger in place. Removed
+    transactions become tombstones, so the merge also drops them from older exports.
+    """
+    for tx in added + modified:
+        transactions[tx['transaction_id']] = tx
+    for tx in removed:
+        transactions[tx['transaction_id']] = plaid_tombstone(tx['transaction_id'])
+
+def sync_item(access_token, folder="statements", count=SYNC_PAGE_SIZE, limit=None):
+    """
+    Incrementally sync one item's transactions into statements/plaid_sync_<item>.ndjson.
+
+    The item's cursor is kept in statements/.plaid_sync/<item>.json. The ledger is
+    written before the cursor, so an interrupted run re-applies the same deltas on
+    the next sync. It also keeps a tombstone for every removed transaction, which
+    survives a full resync. Returns the (added, modified, removed) counts.
+    """
+    key = item_key(access_token)
+    state_path = os.path.join(folder, SYNC_STATE_DIR, f"{key}.json")
+    ledger_path = os.path.join(folder, f"plaid_sync_{key}.ndjson")
+
+    transactions = {}
+    try:
+        transactions = {tx['transaction_id']: tx for tx in iter_plaid_records(ledger_path)}
+        with open(state_path, "r", encoding="utf-8") as f:
+            cursor = json.load(f).get("cursor", "")
+    except FileNotFoundError:
+        # Without both the cursor and its ledger, start over with a full sync, but keep
+        # the tombstones: a full sync never reports the transactions removed before it
+        cursor = ""
+        transactions = {key: tx for key, tx in transactions.items() if tx.get("removed")}
+
+    added, modified, removed, next_cursor = fetch_sync_deltas(access_token, cursor, count, limit)
+    apply_sync_deltas(transactions, added, modified, removed)
+
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    if added or modified or removed or not os.path.exists(ledger_path):
+        tmp_path = f"{ledger_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write_plaid_records(f, transactions.values())
+        os.replace(tmp_path, ledger_path)
+    write_json_atomic(state_path, {"cursor": next_cursor})
+
+    kept = sum(1 for tx in transactions.values() if not tx.get("removed"))
+    logging.info(f"Synced item {key}: {len(added)} added, {len(modified)} modified, {len(removed)} removed")
+    print(f"✅ Synced {kept} transactions to '{ledger_path}' "
+          f"({len(added)} added, {len(modified)} modified, {len(removed)} removed)")
+    return len(added), len(modified), len(removed)
+
+def load_items(tokens_path):
+    """
+    Read linked items from a file with one "[institution] access_token" per line.
+    Items without an institution are treated as their own institution.
+    """
+    items = []
+    with open(tokens_path, "r") as f:
+        for line in f:
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            access_token = fields[-1]
+            institution = fields[0] if len(fields) > 1 else item_key(access_token)
+            items.append((institution, access_token))
+    return items
+
+def sync_items(items, folder="statements", count=SYNC_PAGE_SIZE, workers=FETCH_WORKERS,
+               per_institution=PER_INSTITUTION_LIMIT):
+    """
+    Sync several (institution, access_token) items concurrently over the shared client.
+
+    At most per_institution requests are in flight against any one institution.
+    A failing item is logged and reported as None without stopping the others.
+    Returns each item's (added, modified, removed) counts in input order.
+    """
+    limits = {institution: threading.BoundedSemaphore(per_institution) for institution, _ in items}
+
+    def sync_one(item):
+        institution, access_token = item
+        try:
+            return sync_item(access_token, folder, count, limits[institution])
+        except Exception as e:
+            logging.error(f"Sync failed for item {item_key(access_token)} ({institution}): {e}", exc_info=True)
+            print(f"❌ Sync failed for item {item_key(access_token)} ({institution}): {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as pool:
+        return list(pool.map(sync_one, items))
+
+def sync_main(token_path=".access_token", count=SYNC_PAGE_SIZE, tokens_path=None,
+              workers=FETCH_WORKERS, per_institution=PER_INSTITUTION_LIMIT):
+    logging.info("Plaid sync started")
+    try:
+        if tokens_path:
+            results = sync_items(load_items(tokens_path), count=count, workers=workers, per_institution=per_institution)
+            changed = any(result and any(result) for result in results)
+        else:
+            changed = any(sync_item(load_access_token(token_path), count=count))
+        if changed:
+            store = open_transaction_store()
+            sync_transaction_store(store, "statements")
+            store.close()
+    except Exception as e:
+        logging.error(f"Unexpected error: {e}", exc_info=True)
+        print(f"❌ Error: {e}")
+
+def main(days=30, page_size=PAGE_SIZE):
+    from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
+
     logging.info("Plaid fetch started")
 
     # Generate and print the link token for frontend Plaid Link
@@ -86,54 +300,47 @@ def main():
         public_token = input("Please enter the public_token obtained from Plaid Link: ").strip()
 
         exchange_request = ItemPublicTokenExchangeRequest(public_token=public_token)
-        exchange_response = client.item_public_token_exchange(exchange_request)
+        exchange_response = get_plaid_client().item_public_token_exchange(exchange_request)
         access_token = exchange_response.access_token
 
-        start_date = (datetime.now() - timedelta(days=30)).date()
+        start_date = (datetime.now() - timedelta(days=days)).date()
         end_date = datetime.now().date()
 
-        transactions_request = TransactionsGetRequest(
-            access_token=access_token,
-            start_date=start_date,
-            end_date=end_date
-        )
-
-        max_retries = 5
-        for attempt in range(max_retries):
-            try:
-                transactions_response = client.transactions_get(transactions_request)
-                break
-            except ApiException as e:
-                if "PRODUCT_NOT_READY" in str(e):
-                    logging.warning(f"Product not ready, retrying {attempt + 1}/{max_retries}...")
-                    time.sleep(3)
-                else:
-                    logging.error(f"ApiException: {e}")
-                    raise
-        else:
-            logging.error("Max retries reached, product still not ready.")
-            return
-
-        transactions = transactions_response['transactions']
-
         os.makedirs("statements", exist_ok=True)
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"statements/plaid_transactions_{timestamp}.json"
-
-        with open(filename, "w") as f:
-            json.dump(
-                [tx.to_dict() for tx in transactions],
-                f,
-                indent=2,
-                default=str
-            )
+        filename = f"statements/plaid_transactions_{timestamp}.ndjson"
 
-        logging.info(f"Saved {len(transactions)} transactions to '{filename}'")
-        print(f"✅ Saved {len(transactions)} transactions to '{filename}'")
+        count = fetch_transactions_to_file(access_token, start_date, end_date, filename, page_size)
+
+        logging.info(f"Saved {count} transactions to '{filename}'")
+        print(f"✅ Saved {count} transactions to '{filename}'")
+
+        # Fold the new export into the SQLite transaction store
+        store = open_transaction_store()
+        sync_transaction_store(store, "statements")
+        store.close()
 
     except Exception as e:
         logging.error(f"Unexpected error: {e}", exc_info=True)
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Fetch transactions from Plaid into statements/.")
+    parser.add_argument("--sync", action="store_true",
+                        help="Incrementally sync with /transactions/sync using the saved access token")
+    parser.add_argument("--token-file", default=".access_token", help="Access token file written by exchange_token.py")
+    parser.add_argument("--count", type=int, default=SYNC_PAGE_SIZE, help="Transactions per sync page (max 500)")
+    parser.add_argument("--days", type=int, default=30, help="Days of history to fetch without --sync")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help="Transactions per /transactions/get page (max 500)")
+    parser.add_argument("--tokens-file", help="Sync every item listed in this file (one '[institution] access_token' per line)")
+    parser.add_argument("--workers", type=int, default=FETCH_WORKERS, help="Items to sync concurrently")
+    parser.add_argument("--per-institution", type=int, default=PER_INSTITUTION_LIMIT,
+                        help="Maximum in-flight requests per institution")
+    args = parser.parse_args()
+
+    configure_logging()
+    print_environment()
+    if args.sync or args.tokens_file:
+        sync_main(args.token_file, args.count, args.tokens_file, args.workers, args.per_institution)
+    else:
+        main(args.days, args.page_size)
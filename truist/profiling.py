@@ -0,0 +1,73 @@
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # resource is Unix-only; peak RSS is then left out of the report
+    resource = None
+
+def peak_rss_mb():
+    """
+    Return the process's peak resident set size in MiB, or None where it is unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+class StageProfiler:
+    """
+    Records wall time, row counts, throughput and peak memory for named pipeline stages.
+
+    Peak RSS is process-wide and only ever grows; with trace_memory, tracemalloc also
+    reports the peak Python allocation of each stage on its own, at some cost in speed.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Time the enclosed block as stage name. Set record["rows"] inside it when the count is only known at the end.
+        """
+        record = {"stage": name, "rows": rows}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            elapsed = time.perf_counter() - start
+            record["seconds"] = round(elapsed, 6)
+            if record["rows"] is not None and elapsed > 0:
+                record["rows_per_second"] = round(record["rows"] / elapsed)
+            record["peak_rss_mb"] = peak_rss_mb()
+            if self.trace_memory:
+                record["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / (1 << 20), 1)
+            self.stages.append(record)
+
+    def report(self, **extra):
+        """
+        Return the recorded stages and their total time as a JSON-serializable dict.
+        """
+        return {
+            "stages": self.stages,
+            "total_seconds": round(sum(stage["seconds"] for stage in self.stages), 6),
+            "peak_rss_mb": peak_rss_mb(),
+            **extra
+        }
+
+    def print_summary(self):
+        for stage in self.stages:
+            rows = f"{stage['rows']:>10,} rows" if stage["rows"] is not None else " " * 15
+            rate = f"{stage['rows_per_second']:>12,} rows/s" if "rows_per_second" in stage else " " * 19
+            traced = f", {stage['peak_traced_mb']} MiB traced" if "peak_traced_mb" in stage else ""
+            print(f"{stage['stage'] + ':':<24} {stage['seconds'] * 1000:10.1f} ms {rows} {rate}"
+                  f"  peak RSS {stage['peak_rss_mb']} MiB{traced}")
@@ -0,0 +1,680 @@
+import os
+import re
+import sqlite3
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+DEFAULT_STORE_PATH = "statements/ledger.db"
+ROLLUP_VERSION = 2
+SEARCH_INDEX_VERSION = 2
+RULE_INDEX_VERSION = 1
+TOKEN_RE = re.compile(r"\w+")
+SEARCH_REBUILD_BATCH = 10000
+# Percent of a budget at which an alert is raised: a warning, then the overspend itself
+ALERT_THRESHOLDS = (80, 100)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    day INTEGER,
+    iso_year INTEGER,
+    iso_week INTEGER,
+    month TEXT NOT NULL,
+    description TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    source TEXT NOT NULL,
+    rule TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_day ON transactions(day);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category, day);
+CREATE INDEX IF NOT EXISTS idx_transactions_normalized ON transactions(normalized);
+CREATE INDEX IF NOT EXISTS idx_transactions_month ON transactions(month, category, amount);
+CREATE INDEX IF NOT EXISTS idx_transactions_week ON transactions(iso_year, iso_week, category);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_totals (
+    day INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    first_id INTEGER NOT NULL,
+    PRIMARY KEY (day, category)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS weekly_totals (
+    iso_year INTEGER NOT NULL,
+    iso_week INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    first_id INTEGER NOT NULL,
+    PRIMARY KEY (iso_year, iso_week, category)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS monthly_totals (
+    month TEXT NOT NULL,
+    category TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    first_id INTEGER NOT NULL,
+    PRIMARY KEY (month, category)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS description_tokens (
+    token TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (token, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_description_tokens_id ON description_tokens(id, token);
+CREATE TABLE IF NOT EXISTS token_counts (
+    token TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS budgets (
+    category TEXT NOT NULL,
+    period TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    PRIMARY KEY (category, period)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS budget_alerts (
+    period TEXT NOT NULL,
+    period_key TEXT NOT NULL,
+    category TEXT NOT NULL,
+    threshold INTEGER NOT NULL,
+    spent INTEGER NOT NULL,
+    budget INTEGER NOT NULL,
+    raised_at TEXT NOT NULL,
+    notified INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (period, period_key, category, threshold)
+) WITHOUT ROWID;
+"""
+
+COLUMNS = "date, day, iso_year, iso_week, month, description, normalized, amount, category, source, rule"
+ROW_INDEX = {name: i for i, name in enumerate(COLUMNS.split(", "))}
+
+# Rollup tables and the transaction columns that key them
+ROLLUPS = {
+    "daily_totals": ("day",),
+    "weekly_totals": ("iso_year", "iso_week"),
+    "monthly_totals": ("month",),
+}
+# Budget periods and the rollup table holding their running totals
+BUDGET_PERIODS = {"week": "weekly_totals", "month": "monthly_totals"}
+
+STATEMENTS_SOURCE = "statements"
+MANUAL_SOURCE = "manual"
+
+def budget_period_key(period, key):
+    """
+    Label a rollup key: '2025-W07' for an (iso_year, iso_week) week, 'YYYY-MM' for a month.
+    """
+    return f"{key[0]:04d}-W{key[1]:02d}" if period == "week" else key[0]
+
+def alert_periods(today=None):
+    """
+    Return {(period, rollup key)} for the weeks and months budget alerts are raised in:
+    the current ones, plus the previous ones for transactions that post late.
+    """
+    today = today or date.today()
+    last_week = today - timedelta(weeks=1)
+    last_month = today.replace(day=1) - timedelta(days=1)
+    return {
+        ("week", tuple(today.isocalendar()[:2])), ("week", tuple(last_week.isocalendar()[:2])),
+        ("month", (today.strftime('%Y-%m'),)), ("month", (last_month.strftime('%Y-%m'),)),
+    }
+
+class TransactionStore:
+    """
+    SQLite-backed ledger with indexes on date, category and normalized description.
+
+    Rows keep the parser's transaction fields, with amounts in integer cents and
+    dates as day numbers plus precomputed ISO week and month columns, so the CLI
+    reports are indexed queries instead of scans over a re-parsed ledger.
+
+    Per-day, per-ISO-week and per-month category totals are materialized in rollup
+    tables that every insert and delete adjusts, so period reports read a handful
+    of rollup rows however long the history is. The same writes maintain an inverted
+    index from lowercased description words, digits included, to transaction ids for
+    search().
+
+    Weekly and monthly category budgets are checked against the rollups for just the
+    periods the written rows fall in, so alerts cost time in the new rows only.
+
+    With a rule_matcher, each row also records the categorization rule keyword its
+    description matched, indexed per source, so recategorize() can revisit just the
+    rows a rule edit can affect. rule_matcher() returns a description -> keyword
+    function and is called once per write, not once per row.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, normalize=None, rule_matcher=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.normalize = normalize or (lambda desc: desc.lower())
+        self.rule_matcher = rule_matcher
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        if "rule" not in {column[1] for column in self.conn.execute("PRAGMA table_info(transactions)")}:
+            with self.conn:
+                self.conn.execute("ALTER TABLE transactions ADD COLUMN rule TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_rule ON transactions(source, rule)")
+        if self.get_meta("rollup_version") != str(ROLLUP_VERSION):
+            with self.conn:
+                self.rebuild_rollups()
+        if self.get_meta("search_index_version") != str(SEARCH_INDEX_VERSION):
+            with self.conn:
+                self.rebuild_search_index()
+        if rule_matcher and self.get_meta("rule_index_version") != str(RULE_INDEX_VERSION):
+            with self.conn:
+                self.rebuild_rule_index()
+
+    def close(self):
+        self.conn.close()
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _row(self, tx, source, match_rule=None):
+        date_obj = tx.get('DateObj')
+        if date_obj:
+            iso_year, iso_week, _ = date_obj.isocalendar()
+            day, month = date_obj.toordinal(), date_obj.strftime('%Y-%m')
+        else:
+            iso_year = iso_week = day = None
+            month = 'Unknown'
+        description = tx.get('description', '')
+        return (
+            tx.get('date', ''), day, iso_year, iso_week, month, description,
+            self.normalize(description), tx.get('amount', 0), tx.get('category', 'Miscellaneous'), source,
+            match_rule(description) if match_rule else None
+        )
+
+    def rebuild_rollups(self):
+        """
+        Recompute every rollup table from the transactions table.
+        """
+        for table, keys in ROLLUPS.items():
+            key_columns = ", ".join(keys)
+            self.conn.execute(f"DELETE FROM {table}")
+            self.conn.execute(
+                f"INSERT INTO {table} ({key_columns}, category, total, count, first_id)"
+                f" SELECT {key_columns}, category, SUM(amount), COUNT(*), MIN(id) FROM transactions"
+                f" WHERE {keys[0]} IS NOT NULL GROUP BY {key_columns}, category"
+            )
+        self.set_meta("rollup_version", str(ROLLUP_VERSION))
+
+    def _update_rollups(self, numbered, sign):
+        """
+        Add (sign=1) or subtract (sign=-1) (id, row) pairs from every rollup table.
+        Subtract only once the rows have left their keys in the transactions table, so
+        a key that lost its first row can look up its next one.
+        """
+        amount_index, category_index = ROW_INDEX["amount"], ROW_INDEX["category"]
+        for table, keys in ROLLUPS.items():
+            key_indexes = [ROW_INDEX[key] for key in keys]
+            groups = {}
+            for row_id, row in numbered:
+                if row[key_indexes[0]] is None:
+                    continue
+                key = tuple(row[i] for i in key_indexes) + (row[category_index],)
+                total, count, first_id = groups.get(key, (0, 0, row_id))
+                groups[key] = (total + row[amount_index], count + 1, min(first_id, row_id))
+            if not groups:
+                continue
+
+            key_columns = ", ".join(keys)
+            self.conn.executemany(
+                f"INSERT INTO {table} ({key_columns}, category, total, count, first_id)"
+                f" VALUES ({', '.join('?' * (len(keys) + 4))})"
+                f" ON CONFLICT ({key_columns}, category) DO UPDATE SET"
+                " total = total + excluded.total, count = count + excluded.count,"
+                " first_id = MIN(first_id, excluded.first_id)",
+                [key + (sign * total, sign * count, first_id) for key, (total, count, first_id) in groups.items()]
+            )
+            self.conn.execute(f"DELETE FROM {table} WHERE count <= 0")
+            if sign < 0:
+                # Only a key whose first row was removed needs its next smallest id
+                key_match = " AND ".join(f"{column} = ?" for column in keys + ("category",))
+                self.conn.executemany(
+                    f"UPDATE {table} SET first_id = (SELECT MIN(id) FROM transactions WHERE {key_match})"
+                    f" WHERE {key_match} AND first_id = ?",
+                    [key + key + (first_id,) for key, (_, _, first_id) in groups.items()]
+                )
+
+    @staticmethod
+    def _tokens(text):
+        # Unlike the dedup normalization, keep digits so store numbers and numeric keywords are searchable
+        return set(TOKEN_RE.findall(text.lower()))
+
+    def rebuild_search_index(self):
+        """
+        Recompute the description token index and its token counts from the transactions table.
+        """
+        self.conn.execute("DELETE FROM description_tokens")
+        self.conn.execute("DELETE FROM token_counts")
+        rows = self.conn.execute("SELECT id, description FROM transactions")
+        while batch := rows.fetchmany(SEARCH_REBUILD_BATCH):
+            self._index_tokens(batch, 1)
+        self.set_meta("search_index_version", str(SEARCH_INDEX_VERSION))
+
+    def _index_tokens(self, id_descriptions, sign):
+        """
+        Add (sign=1) or remove (sign=-1) the tokens of (id, description) pairs,
+        keeping token_counts at the number of transactions holding each token.
+        """
+        pairs = [(token, row_id) for row_id, description in id_descriptions for token in self._tokens(description)]
+        if sign > 0:
+            self.conn.executemany("INSERT INTO description_tokens (token, id) VALUES (?, ?)", pairs)
+        else:
+            self.conn.executemany("DELETE FROM description_tokens WHERE token = ? AND id = ?", pairs)
+        counts = Counter(token for token, _ in pairs)
+        self.conn.executemany(
+            "INSERT INTO token_counts (token, count) VALUES (?, ?)"
+            " ON CONFLICT (token) DO UPDATE SET count = count + excluded.count",
+            [(token, sign * count) for token, count in counts.items()]
+        )
+        if sign < 0:
+            self.conn.execute("DELETE FROM token_counts WHERE count <= 0")
+
+    def rebuild_rule_index(self):
+        """
+        Re-record every row's matched rule keyword with the rule_matcher.
+        """
+        match_rule = self.rule_matcher()
+        rows = self.conn.execute("SELECT id, description FROM transactions")
+        while batch := rows.fetchmany(SEARCH_REBUILD_BATCH):
+            self.conn.executemany(
+                "UPDATE transactions SET rule = ? WHERE id = ?",
+                [(match_rule(description), row_id) for row_id, description in batch]
+            )
+        self.set_meta("rule_index_version", str(RULE_INDEX_VERSION))
+
+    def _insert_rows(self, rows):
+        """
+        Insert row tuples under fresh ids and fold them into the rollups. Returns the count.
+        """
+        next_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM transactions").fetchone()[0]
+        numbered = list(enumerate(rows, next_id))
+        self.conn.executemany(
+            f"INSERT INTO transactions (id, {COLUMNS}) VALUES ({', '.join('?' * (len(ROW_INDEX) + 1))})",
+            [(row_id,) + row for row_id, row in numbered]
+        )
+        self._update_rollups(numbered, 1)
+        description_index = ROW_INDEX["description"]
+        self._index_tokens([(row_id, row[description_index]) for row_id, row in numbered], 1)
+        return len(numbered)
+
+    def _delete_rows(self, numbered):
+        """
+        Delete (id, row) pairs and take them out of the rollups.
+        """
+        self.conn.executemany("DELETE FROM transactions WHERE id = ?", [(row_id,) for row_id, _ in numbered])
+        self._update_rollups(numbered, -1)
+        description_index = ROW_INDEX["description"]
+        self._index_tokens([(row_id, row[description_index]) for row_id, row in numbered], -1)
+
+    def insert(self, transactions, source=STATEMENTS_SOURCE):
+        """
+        Insert transactions tagged with source and return how many were added.
+        """
+        with self.conn:
+            match_rule = self.rule_matcher() if self.rule_matcher else None
+            rows = [self._row(tx, source, match_rule) for tx in transactions]
+            self._insert_rows(rows)
+            self._check_budgets(rows)
+        return len(rows)
+
+    def replace_source(self, transactions, source=STATEMENTS_SOURCE, fingerprint=None, rules=None):
+        """
+        Atomically make source's rows match transactions, recording the fingerprint they
+        were built from and the rules text they were categorized with.
+
+        Rows already stored are kept, so only additions and removals are written and
+        folded into the rollups. Returns the (added, removed) counts.
+        """
+        match_rule = self.rule_matcher() if self.rule_matcher else None
+        with self.conn:
+            existing = defaultdict(list)
+            for row_id, *row in self.conn.execute(
+                f"SELECT id, {COLUMNS} FROM transactions WHERE source = ? ORDER BY id DESC", (source,)
+            ):
+                existing[tuple(row)].append(row_id)
+
+            added = []
+            for tx in transactions:
+                row = self._row(tx, source, match_rule)
+                ids = existing.get(row)
+                if ids:
+                    ids.pop()
+                else:
+                    added.append(row)
+
+            removed = [(row_id, row) for row, ids in existing.items() for row_id in ids]
+            self._delete_rows(removed)
+            self._insert_rows(added)
+            self._check_budgets(added + [row for _, row in removed])
+            if fingerprint is not None:
+                self.set_meta(f"fingerprint:{source}", fingerprint)
+            if rules is not None:
+                self.set_meta(f"rules:{source}", rules)
+        return len(added), len(removed)
+
+    def recategorize(self, keywords, added_keywords, classify, source=STATEMENTS_SOURCE,
+                     fingerprint=None, rules=None):
+        """
+        Re-run classify(description, amount) -> (category, rule keyword) over the rows of
+        source a rule edit can affect: those whose recorded rule is one of keywords, found
+        through the rule index, and those whose upper-cased description contains one of
+        added_keywords, found with one scan of the descriptions.
+
+        Each re-evaluated row's category and rule are re-recorded. Rows whose category
+        changes are moved between rollups and rechecked against budgets. The fingerprint
+        and rules text are recorded as in replace_source. Returns the (re-evaluated,
+        changed) counts.
+        """
+        with self.conn:
+            keywords, added_keywords = list(keywords), list(added_keywords)
+            candidates = {row_id: tuple(row) for row_id, *row in self.conn.execute(
+                f"SELECT id, {COLUMNS} FROM transactions WHERE source = ? AND rule IN ({', '.join('?' * len(keywords))})",
+                [source] + keywords
+            )}
+            if added_keywords:
+                # Match like the categorizer, on Python's upper-casing (SQLite's upper() is ASCII-only),
+                # in one scan; '+source' keeps SQLite from walking the rule index instead of the table
+                pattern = re.compile("|".join(map(re.escape, added_keywords)))
+                self.conn.create_function(
+                    "has_added_keyword", 1, lambda description: pattern.search(description.upper()) is not None
+                )
+                candidates.update((row_id, tuple(row)) for row_id, *row in self.conn.execute(
+                    f"SELECT id, {COLUMNS} FROM transactions WHERE +source = ? AND has_added_keyword(description)",
+                    (source,)
+                ))
+
+            category_index, rule_index = ROW_INDEX["category"], ROW_INDEX["rule"]
+            description_index, amount_index = ROW_INDEX["description"], ROW_INDEX["amount"]
+            updates, removed, added = [], [], []
+            for row_id, row in candidates.items():
+                category, rule = classify(row[description_index], row[amount_index])
+                if (category, rule) == (row[category_index], row[rule_index]):
+                    continue
+                updates.append((category, rule, row_id))
+                if category != row[category_index]:
+                    new_row = list(row)
+                    new_row[category_index], new_row[rule_index] = category, rule
+                    removed.append((row_id, row))
+                    added.append((row_id, tuple(new_row)))
+
+            self.conn.executemany("UPDATE transactions SET category = ?, rule = ? WHERE id = ?", updates)
+            self._update_rollups(removed, -1)
+            self._update_rollups(added, 1)
+            self._check_budgets([row for _, row in removed + added])
+            if fingerprint is not None:
+                self.set_meta(f"fingerprint:{source}", fingerprint)
+            if rules is not None:
+                self.set_meta(f"rules:{source}", rules)
+        return len(candidates), len(added)
+
+    def budgets(self):
+        """
+        Return {(category, period): budget in cents} for every 'week' and 'month' budget.
+        """
+        return {(category, period): amount for category, period, amount in self.conn.execute(
+            "SELECT category, period, amount FROM budgets"
+        )}
+
+    def set_budget(self, category, period, amount, today=None):
+        """
+        Set category's spending budget in cents per 'week' or 'month', or remove it if amount <= 0.
+        The category's current periods are checked against the new budget right away.
+        """
+        if period not in BUDGET_PERIODS:
+            raise ValueError(f"Unknown budget period: {period}")
+        with self.conn:
+            if amount > 0:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO budgets (category, period, amount) VALUES (?, ?, ?)",
+                    (category, period, amount)
+                )
+            else:
+                self.conn.execute("DELETE FROM budgets WHERE category = ? AND period = ?", (category, period))
+            for alert_period, key in alert_periods(today):
+                if alert_period == period:
+                    self._check_budget(period, key, category, amount)
+
+    def _period_spent(self, period, key, category):
+        """
+        Cents spent in category over one rollup period, net of refunds.
+        """
+        keys = ROLLUPS[BUDGET_PERIODS[period]]
+        row = self.conn.execute(
+            f"SELECT total FROM {BUDGET_PERIODS[period]} WHERE"
+            f" {' AND '.join(f'{column} = ?' for column in keys)} AND category = ?",
+            key + (category,)
+        ).fetchone()
+        return -row[0] if row else 0
+
+    def _check_budgets(self, rows, today=None):
+        """
+        Check the budgets of the periods and categories that written row tuples fall in.
+        Rows outside the alert periods or without a budget cost a couple of set lookups.
+        """
+        budgets = self.budgets()
+        if not budgets or not rows:
+            return
+        periods = alert_periods(today)
+        category_index = ROW_INDEX["category"]
+        key_indexes = {
+            period: [ROW_INDEX[column] for column in ROLLUPS[table]] for period, table in BUDGET_PERIODS.items()
+        }
+        touched = set()
+        for row in rows:
+            for period, indexes in key_indexes.items():
+                if (row[category_index], period) in budgets:
+                    key = tuple(row[i] for i in indexes)
+                    if (period, key) in periods:
+                        touched.add((period, key, row[category_index]))
+        for period, key, category in touched:
+            self._check_budget(period, key, category, budgets[(category, period)])
+
+    def _check_budget(self, period, key, category, budget):
+        """
+        Raise the alerts whose thresholds category's spending in one period has crossed.
+
+        Each threshold is raised once per period. One that spending falls back under,
+        after a refund or a removed transaction, is cleared so it can be raised again.
+        """
+        spent = self._period_spent(period, key, category) if budget > 0 else 0
+        crossed = {threshold for threshold in ALERT_THRESHOLDS if budget > 0 and spent * 100 >= threshold * budget}
+        label = budget_period_key(period, key)
+        raised = {threshold for (threshold,) in self.conn.execute(
+            "SELECT threshold FROM budget_alerts WHERE period = ? AND period_key = ? AND category = ?",
+            (period, label, category)
+        )}
+        self.conn.executemany(
+            "DELETE FROM budget_alerts WHERE period = ? AND period_key = ? AND category = ? AND threshold = ?",
+            [(period, label, category, threshold) for threshold in raised - crossed]
+        )
+        raised_at = datetime.now().isoformat(timespec="seconds")
+        self.conn.executemany(
+            "INSERT INTO budget_alerts (period, period_key, category, threshold, spent, budget, raised_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(period, label, category, threshold, spent, budget, raised_at) for threshold in crossed - raised]
+        )
+
+    def take_alerts(self):
+        """
+        Return the budget alerts raised since the last call, oldest first, and mark them delivered.
+        """
+        with self.conn:
+            alerts = [
+                {
+                    'period': period, 'period_key': label, 'category': category,
+                    'threshold': threshold, 'spent': spent, 'budget': budget
+                }
+                for period, label, category, threshold, spent, budget in self.conn.execute(
+                    "SELECT period, period_key, category, threshold, spent, budget FROM budget_alerts"
+                    " WHERE notified = 0 ORDER BY raised_at, period_key, category, threshold"
+                )
+            ]
+            self.conn.execute("UPDATE budget_alerts SET notified = 1 WHERE notified = 0")
+        return alerts
+
+    def budget_status(self, today=None):
+        """
+        Return [(category, period, period label, spent cents, budget cents)] for every
+        budget in the current week or month, by category.
+        """
+        today = today or date.today()
+        current = {"week": tuple(today.isocalendar()[:2]), "month": (today.strftime('%Y-%m'),)}
+        return [
+            (category, period, budget_period_key(period, current[period]),
+             self._period_spent(period, current[period], category), budget)
+            for (category, period), budget in sorted(self.budgets().items())
+        ]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def _transactions(self, where="", params=()):
+        query = (
+            "SELECT date, description, amount, category, day FROM transactions"
+            f" {where} ORDER BY COALESCE(day, 0), id"
+        )
+        for date_str, description, amount, category, day in self.conn.execute(query, params):
+            yield {
+                'date': date_str,
+                'description': description,
+                'amount': amount,
+                'category': category,
+                'DateObj': datetime.fromordinal(day) if day else None
+            }
+
+    def iter_transactions(self):
+        """
+        Yield every stored transaction in date order.
+        """
+        return self._transactions()
+
+    def category_transactions(self, category):
+        """
+        Yield the transactions of one category in date order.
+        """
+        return self._transactions("WHERE category = ?", (category,))
+
+    def _prefix_bounds(self, term):
+        # A prefix covers the tokens from itself up to (not including) its successor string
+        return term, term[:-1] + chr(ord(term[-1]) + 1)
+
+    def _term_matches(self, term):
+        """
+        Return how many index entries fall under term's prefix, from the token counts.
+        """
+        return self.conn.execute(
+            "SELECT COALESCE(SUM(count), 0) FROM token_counts WHERE token >= ? AND token < ?", self._prefix_bounds(term)
+        ).fetchone()[0]
+
+    def search(self, query, start_day=None, end_day=None):
+        """
+        Yield transactions whose description has a token starting with every term of
+        query, in date order, optionally limited to day numbers in [start_day, end_day].
+
+        Query terms are split into lowercased words like the indexed descriptions, so
+        'AMAZON MKTPL' and 'amaz mkt' both match 'AMAZON MKTPL*AB12', and digits such as
+        a store number narrow the match instead of being dropped. The most selective
+        term is range-scanned in the token index and every other term is checked per
+        candidate with an index seek, so a query costs about as much as its rarest term.
+        """
+        terms = sorted(self._tokens(query), key=self._term_matches)
+        if not terms:
+            return iter(())
+        lookup = "SELECT d.id FROM description_tokens d WHERE d.token >= ? AND d.token < ?"
+        lookup += "".join(
+            " AND EXISTS (SELECT 1 FROM description_tokens t WHERE t.id = d.id AND t.token >= ? AND t.token < ?)"
+            for _ in terms[1:]
+        )
+        params = [bound for term in terms for bound in self._prefix_bounds(term)]
+        where = f"WHERE id IN ({lookup})"
+        if start_day is not None or end_day is not None:
+            where += " AND day BETWEEN ? AND ?"
+            params += [start_day if start_day is not None else 1, end_day if end_day is not None else date.max.toordinal()]
+        return self._transactions(where, params)
+
+    def date_range_transactions(self, start_day, end_day):
+        """
+        Yield transactions with day numbers in [start_day, end_day], in date order.
+        """
+        return self._transactions("WHERE day BETWEEN ? AND ?", (start_day, end_day))
+
+    def total_expenses(self):
+        """
+        Total absolute cents of negative, non-transfer transactions.
+        """
+        row = self.conn.execute(
+            "SELECT COALESCE(SUM(-amount), 0) FROM transactions WHERE amount < 0 AND category != 'Transfers'"
+        ).fetchone()
+        return row[0]
+
+    def _rollup_totals(self, table, where="", params=()):
+        """
+        Read {period: {category: cents}} from a rollup table, excluding transfers.
+        Periods whose only rows are transfers are present with no categories.
+        """
+        keys = ROLLUPS[table]
+        periods = {}
+        rows = self.conn.execute(
+            f"SELECT {', '.join(keys)}, category, total FROM {table} {where} ORDER BY first_id", params
+        )
+        for *key, category, total in rows:
+            totals = periods.setdefault(key[0] if len(key) == 1 else tuple(key), {})
+            if category != 'Transfers':
+                totals[category] = total
+        return periods
+
+    def weekly_totals(self, weeks):
+        """
+        Total cents by category for each ISO (year, week) in weeks, excluding transfers.
+        Weeks with nothing but transfers are left out.
+        """
+        totals = {}
+        for iso_year, iso_week in weeks:
+            totals.update(self._rollup_totals(
+                "weekly_totals", "WHERE iso_year = ? AND iso_week = ?", (iso_year, iso_week)
+            ))
+        return {week: cats for week, cats in totals.items() if cats}
+
+    def monthly_totals(self):
+        """
+        Total cents by 'YYYY-MM' month (or 'Unknown') and category, excluding transfers.
+        Months that only hold transfers are present with no categories.
+        """
+        return self._rollup_totals("monthly_totals")
+
+    def last_periods(self, period, count, today=None):
+        """
+        Return [(period, {category: cents})] for the last count days, ISO weeks or months
+        up to today, oldest first, with empty periods included. Periods are day numbers,
+        (iso_year, iso_week) tuples or 'YYYY-MM' strings.
+        """
+        today = today or date.today()
+        if count <= 0:
+            return []
+        if period == "day":
+            periods = [today.toordinal() - offset for offset in range(count - 1, -1, -1)]
+            totals = self._rollup_totals("daily_totals", "WHERE day BETWEEN ? AND ?", (periods[0], periods[-1]))
+        elif period == "week":
+            periods = [tuple((today - timedelta(weeks=offset)).isocalendar()[:2]) for offset in range(count - 1, -1, -1)]
+            totals = self.weekly_totals(periods)
+        elif period == "month":
+            index = today.year * 12 + today.month - 1
+            periods = [f"{i // 12:04d}-{i % 12 + 1:02d}" for i in range(index - count + 1, index + 1)]
+            totals = self._rollup_totals("monthly_totals", "WHERE month BETWEEN ? AND ?", (periods[0], periods[-1]))
+        else:
+            raise ValueError(f"Unknown period: {period}")
+        return [(key, totals.get(key, {})) for key in periods]
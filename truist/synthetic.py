@@ -0,0 +1,142 @@
+import os
+import csv
+import random
+import argparse
+import itertools
+from datetime import datetime, timedelta
+
+from parser import CATEGORY_KEYWORDS, PAYCHECK_KEYWORDS, write_plaid_records
+
+CITIES = ["SARASOTA FL", "BRADENTON FL", "VENICE FL", "TAMPA FL", "ST PETERSBURG FL"]
+PREFIXES = ["DEBIT CARD PURCHASE", "POS PURCHASE", "ACH DEBIT", "RECURRING PURCHASE"]
+UNKNOWN_MERCHANTS = ["LOCAL HARDWARE", "FARMERS MARKET", "CITY PARKING", "VET CLINIC", "BOOKSTORE", "DRY CLEANER"]
+# Typical expense size in cents per category, used as the median of a log-normal draw
+CATEGORY_MEDIANS = {
+    "Rent/Utilities": 12000, "Eating Out": 1800, "Groceries/Home": 6500, "Transportation": 4000,
+    "Subscriptions": 1500, "Online Shopping": 3500, "Insurance": 15000, "Phone": 6000, "Clothes": 4500,
+}
+DEFAULT_MEDIAN = 2500
+
+class MerchantModel:
+    """
+    Deterministic merchant distribution drawn from the categorization rules.
+
+    Every rule keyword becomes a merchant, plus a few that match no rule. Merchants
+    are shuffled by seed and drawn with Zipf-like weights, so a handful of merchants
+    dominate the ledger the way a real account's coffee shop and grocery store do.
+    """
+
+    def __init__(self, seed=0, skew=1.1):
+        rng = random.Random(seed)
+        merchants = [
+            (keyword, category)
+            for category, keywords in CATEGORY_KEYWORDS.items()
+            if category not in ("Paychecks", "Cash Income", "Transfers", "Fees")
+            for keyword in keywords
+        ]
+        merchants += [(name, "Miscellaneous") for name in UNKNOWN_MERCHANTS]
+        rng.shuffle(merchants)
+        self.merchants = merchants
+        self.cum_weights = list(itertools.accumulate(1 / (rank + 1) ** skew for rank in range(len(merchants))))
+
+    def sample(self, rng):
+        return rng.choices(self.merchants, cum_weights=self.cum_weights)[0]
+
+def generate_rows(count, seed=0, start=datetime(2016, 1, 1), years=10):
+    """
+    Yield count (datetime, description, amount in cents) rows in date order without holding them.
+
+    Days advance evenly across the span, paychecks land every other Friday, and about
+    one row in a hundred repeats the previous row, as overlapping exports do.
+    """
+    rng = random.Random(seed)
+    model = MerchantModel(seed)
+    days = years * 365
+    previous = None
+    for i in range(count):
+        date_obj = start + timedelta(days=i * days // count)
+        if previous and rng.random() < 0.01:
+            yield previous
+            continue
+        if date_obj.weekday() == 4 and (date_obj - start).days // 7 % 2 == 0 and rng.random() < 0.02:
+            description = f"{rng.choice(PAYCHECK_KEYWORDS)} ACME CORP"
+            amount = rng.randint(150000, 250000)
+        elif rng.random() < 0.01:
+            description = f"TRUIST ONLINE TRANSFER {rng.randint(100000, 999999)}"
+            amount = rng.choice([-1, 1]) * rng.randint(5000, 100000)
+        else:
+            keyword, category = model.sample(rng)
+            description = f"{rng.choice(PREFIXES)} {keyword} {rng.randint(1000, 9999)} {rng.choice(CITIES)}"
+            median = CATEGORY_MEDIANS.get(category, DEFAULT_MEDIAN)
+            amount = -max(1, int(rng.lognormvariate(0, 0.8) * median))
+        previous = (date_obj, description, amount)
+        yield previous
+
+def format_truist_amount(cents):
+    """
+    Format cents the way Truist CSV exports do: $1,234.56 for credits, ($1,234.56) for debits.
+    """
+    text = f"${abs(cents) // 100:,}.{abs(cents) % 100:02d}"
+    return f"({text})" if cents < 0 else text
+
+def write_truist_csv(path, rows):
+    """
+    Write rows as a Truist-style CSV. Returns the number of rows written.
+    """
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(("Posted Date", "Date", "Description", "Amount"))
+        for date_obj, description, amount in rows:
+            writer.writerow((date_obj.strftime('%m/%d/%Y'), "", description, format_truist_amount(amount)))
+            count += 1
+    return count
+
+def write_plaid_export(path, rows, seed=0):
+    """
+    Write rows as a newline-delimited Plaid export. Returns the number of rows written.
+    """
+    records = (
+        {
+            "transaction_id": f"synthetic-{seed}-{i}",
+            "date": date_obj.strftime("%Y-%m-%d"),
+            "amount": amount / 100,
+            "name": description,
+        }
+        for i, (date_obj, description, amount) in enumerate(rows)
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        return write_plaid_records(f, records)
+
+def generate_statements(folder, rows, seed=0, csv_files=4, plaid_share=0.2, years=10):
+    """
+    Fill folder with csv_files Truist CSVs and one Plaid export holding plaid_share of rows.
+    Returns the list of files written.
+    """
+    os.makedirs(folder, exist_ok=True)
+    plaid_rows = int(rows * plaid_share)
+    csv_rows = rows - plaid_rows
+    paths = []
+    for n in range(csv_files):
+        share = csv_rows // csv_files + (1 if n < csv_rows % csv_files else 0)
+        path = os.path.join(folder, f"synthetic_{n:02d}.csv")
+        write_truist_csv(path, generate_rows(share, seed + n, years=years))
+        paths.append(path)
+    if plaid_rows:
+        path = os.path.join(folder, f"plaid_synthetic_{seed}.ndjson")
+        write_plaid_export(path, generate_rows(plaid_rows, seed + csv_files, years=years), seed)
+        paths.append(path)
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Truist CSVs and a Plaid export.")
+    parser.add_argument("folder", help="Folder to write the statements into")
+    parser.add_argument("--rows", type=int, default=100_000, help="Total number of transactions")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--csv-files", type=int, default=4, help="Number of CSV files to split the CSV rows across")
+    parser.add_argument("--plaid-share", type=float, default=0.2, help="Fraction of rows written to the Plaid export")
+    parser.add_argument("--years", type=int, default=10, help="Years of history to spread the rows over")
+    args = parser.parse_args()
+
+    for path in generate_statements(args.folder, args.rows, args.seed, args.csv_files, args.plaid_share, args.years):
+        print(f"✅ Wrote {path}")